@@ -1,10 +1,141 @@
+import argparse
+import importlib
 import json
-import requests
-import pandas as pd
 import logging
 from datetime import datetime , timezone
 import os
-from path_handler import adjust_path_for_os
+import re
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from exporters import ExcelExporter, EXPORTERS, make_exporters
+from instrumentation import Instrumentation
+from issue_record import JIRA_TIMESTAMP_FORMAT, decode_page, newest_updated
+from jql_dedup import ORDER_BY_PATTERN
+from response_cache import ResponseCache
+from snapshot_store import SnapshotStore
+
+class LazyModule:
+
+    # Imports the named module on first attribute access. pandas and requests are most of the start-up
+    # time, and --help, --validate and --dry-run never need them.
+    def __init__(self, name):
+        self.name = name
+        self.module = None
+
+    def __getattr__(self, attribute):
+        if self.module is None:
+            self.module = importlib.import_module(self.name)
+        return getattr(self.module, attribute)
+
+pd = LazyModule('pandas')
+requests = LazyModule('requests')
+
+# Fields the per-issue calculations actually read; everything else is left on the server
+ISSUE_FIELDS = "priority,created,resolutiondate,updated"
+
+# Issue fields plus the ones a shared multi-team fetch filters locally (see jql_dedup.py)
+FILTER_FIELDS = ISSUE_FIELDS + ",status,resolution,labels"
+FILTER_COLUMNS = ['status', 'resolution', 'labels']
+
+# Issue state kept in the snapshot store
+SNAPSHOT_FIELDS = "priority,status,resolution,created,resolutiondate,labels,updated"
+
+# JQL clause selecting each report priority bucket, used by the count-only fetch path
+PRIORITY_CLAUSES = {
+    'Blocker': 'priority = Blocker',
+    'Critical': 'priority = Critical',
+    'Others': '(priority not in (Blocker, Critical) OR priority is EMPTY)'
+}
+
+CATEGORIES = ['Regression', 'Exploratory']
+PRIORITIES = ['Blocker', 'Critical', 'Others']
+
+COMMON_SUB_QUERIES = ["BugsRaised", "Resolved", "Fixed", "GerritFix", "Noise", "Resolution"]
+# Sub-queries with a report row. Resolution% is derived from Resolved and BugsRaised, so the Resolution
+# template is still required but never fetched, so problems in it are only warnings.
+REPORT_SUB_QUERIES = ["BugsRaised", "Resolved", "Fixed", "GerritFix", "Noise"]
+DEFECT_QUERIES = ["Resolved_Defect", "Un-Resolved_Defect"]
+
+# Defect-age groups by Jira priority name; priorities outside these groups are left out of the ages
+AGE_PRIORITY_GROUPS = {
+    'Blocker': 'Blocker',
+    'Critical': 'Critical',
+    'Major': 'Others',
+    'Minor': 'Others',
+    'Trivial': 'Others'
+}
+
+# Columns of the per-issue detail export, one row per issue and query
+ISSUE_DETAIL_COLUMNS = ['category', 'sub_query', 'key', 'priority_name', 'priority', 'created', 'resolved']
+
+# Template placeholders filled in per report period; anything else in {{...}} is a typo
+TEMPLATE_PLACEHOLDERS = {"start_date", "end_date"}
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*(\w*)\s*\}\}')
+
+# Period clauses in the queries.json templates; trend reports replace them with local filtering on 'created'
+START_DATE_CLAUSE = re.compile(r'created\s*(>=|>)\s*"\{\{start_date\}\}"', re.IGNORECASE)
+END_DATE_CLAUSE = re.compile(r'created\s*(<=|<)\s*"\{\{end_date\}\}"', re.IGNORECASE)
+
+class QueryMemo:
+
+    # Fetch results keyed by fetch kind and final JQL, so identical queries hit Jira once.
+    # Futures are stored instead of results so concurrent identical queries wait on the first one.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.futures = {}
+            # Consumers still expected per key (see expect); keys without an entry are kept until the next reset
+            self.consumers = {}
+            self.hits = 0
+            self.misses = 0
+
+    def key(self, fetch, jql_query, kwargs):
+        return (fetch.__name__, jql_query, tuple(sorted(kwargs.items())))
+
+    def expect(self, fetches):
+        # Announce (fetch, jql_query, kwargs) requests up front, e.g. every report of a batch run; a result is
+        # dropped once the last of them has it, so a long batch doesn't hold every issue frame it fetched
+        with self.lock:
+            for fetch, jql_query, kwargs in fetches:
+                key = self.key(fetch, jql_query, kwargs)
+                self.consumers[key] = self.consumers.get(key, 0) + 1
+
+    def release(self, key):
+        with self.lock:
+            if key not in self.consumers:
+                return
+            self.consumers[key] -= 1
+            if self.consumers[key] == 0:
+                del self.consumers[key]
+                self.futures.pop(key, None)
+
+    def fetch(self, fetch, jql_query, **kwargs):
+        key = self.key(fetch, jql_query, kwargs)
+        with self.lock:
+            future = self.futures.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self.futures[key] = future
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if is_owner:
+            try:
+                future.set_result(fetch(jql_query, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+        try:
+            return future.result()
+        finally:
+            self.release(key)
 
 class JiraReportGenerator:
 
@@ -12,90 +143,315 @@ class JiraReportGenerator:
     download_path = "add path"
     output_excel_file = os.path.join(download_path, "report", "output.xlsx")
 
-    def __init__(self, api_url, auth, json_file_path):
+    def __init__(self, api_url, auth, json_file_path, page_size=100, max_workers=4, max_in_flight=8, count_only=True, cache=None, client=None, memo=None,
+                 exporters=None, export_issues=False, snapshots=None, pagination='offset', queries=None):
 
         self.api_url = api_url
         self.auth = auth
         self.json_file_path = json_file_path
+        # Already parsed queries.json contents (e.g. kept by the report service); read from json_file_path otherwise
+        self.queries = queries
         self.regression_data = []
+        # Pagination settings: issues per request and how many pages may be fetched at once
+        self.page_size = page_size
+        self.max_workers = max_workers
+        # 'offset' pages with startAt; 'keyset' pages by issue id (see iter_issue_pages_keyset)
+        self.pagination = pagination
+        # Pooled, retrying HTTP client; max_in_flight caps concurrent requests across all scheduled queries
+        if client is None:
+            from jira_client import JiraClient
+            client = JiraClient(api_url, auth, pool_size=max_in_flight, max_in_flight=max_in_flight)
+        self.client = client
+        # Count metrics read only 'total' (maxResults=0) per priority bucket instead of downloading the issues.
+        # Exporting the issue-level detail needs the issues themselves, so it turns count-only off.
+        self.count_only = count_only and not export_issues
+        self.export_issues = export_issues
+        # Output formats (see exporters.py); Excel only unless asked otherwise
+        self.exporters = exporters or [ExcelExporter()]
+        # Optional on-disk ResponseCache for issue-level queries, shared across runs
+        self.cache = cache
+        # Optional SnapshotStore; when set, reports are built from stored issue state plus the changes since the last run
+        self.snapshots = snapshots
+        # Per-run memo of fetch results keyed by the final JQL. A memo passed in (e.g. by a batch run)
+        # is shared with other generators and is not reset between runs.
+        self.query_memo = memo or QueryMemo()
+        self.owns_memo = memo is None
+        # Per-run request and phase timings, written next to the report
+        self.instrumentation = Instrumentation()
+
+    def fetch_page(self, jql_query, start_at, max_results, fields=None, query_name=None):
+        params = {'jql': jql_query, 'startAt': start_at, 'maxResults': max_results}
+        if fields:
+            params['fields'] = fields
+        return decode_page(self.client.search(params, self.instrumentation, query_name))
+
+    def fetch_issue_count(self, jql_query):
+        try:
+            # maxResults=0 returns only the match count, no issue bodies
+            return self.fetch_page(jql_query, 0, 0).get('total', 0)
+        except requests.exceptions.RequestException as e:
+            logging.error("Jira API count request failed for '%s': %s", jql_query, str(e))
+            raise
 
-    def  calculate_overall_metrics(self, report_layout):
-        priorities = ['Blocker', 'Critical', 'Others']
+    def iter_issue_pages(self, jql_query, fields=None):
+        if self.pagination == 'keyset':
+            yield from self.iter_issue_pages_keyset(jql_query, fields)
+            return
 
-        # Initialize overall values
-        overall_resolved = 0
-        overall_bugs_raised = 0
-        overall_noise_issues = 0
-        overall_fixed_issues = 0
-        overall_gerrit_issues = 0
+        # The first page tells us how many issues match and how many Jira returns per page
+        first_page = self.fetch_page(jql_query, 0, self.page_size, fields)
+        total_issues = first_page.get('total', 0)
+        page_size = first_page.get('maxResults') or self.page_size
+        yield first_page.get('issues', [])
 
-        for priority in priorities:
-            # Calculate overall resolved issues and bugs raised
-            overall_resolved += report_layout.loc['Resolved', ('Regression', priority)] + report_layout.loc['Resolved', ('Exploratory', priority)]
-            overall_bugs_raised += report_layout.loc['BugsRaised', ('Regression', priority)] + report_layout.loc['BugsRaised', ('Exploratory', priority)]
+        remaining_starts = iter(range(page_size, total_issues, page_size))
+        if self.max_workers <= 1:
+            for start_at in remaining_starts:
+                yield self.fetch_page(jql_query, start_at, page_size, fields).get('issues', [])
+            return
 
-            # Calculate overall noise issues
-            overall_noise_issues += report_layout.loc['Noise', ('Regression', priority)] + report_layout.loc['Noise', ('Exploratory', priority)]
+        # Keep at most max_workers pages in flight and hand them out in startAt order,
+        # so memory is bounded by that window rather than by the size of the result
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            window = deque(executor.submit(self.fetch_page, jql_query, start_at, page_size, fields)
+                           for start_at in islice(remaining_starts, self.max_workers))
+            while window:
+                page = window.popleft().result()
+                next_start = next(remaining_starts, None)
+                if next_start is not None:
+                    window.append(executor.submit(self.fetch_page, jql_query, next_start, page_size, fields))
+                yield page.get('issues', [])
+
+    def fetch_keyset_page(self, jql_filter, after_id, upper_id, max_results, fields=None):
+        # One page of a keyset scan: the next issues by id after the last one seen, never an offset
+        clauses = [f"({jql_filter})"]
+        if after_id is not None:
+            clauses.append(f"id > {after_id}")
+        if upper_id is not None:
+            clauses.append(f"id <= {upper_id}")
+        return self.fetch_page(" AND ".join(clauses) + " ORDER BY id ASC", 0, max_results, fields, query_name=jql_filter)
+
+    def id_shards(self, jql_filter):
+        # Split the query's issues into up to max_workers (after_id, upper_id] id ranges scanned side by side.
+        # Jira resolves an id literal by looking the issue up, so every bound is the id of a matching issue: the
+        # last one before each shard's share of the result, in id order. The outer ranges are left open so
+        # issues created during the scan are still picked up.
+        ordered = f"({jql_filter}) ORDER BY id ASC"
+        total_issues = self.fetch_page(ordered, 0, 0, query_name=jql_filter).get('total', 0)
+        shard_count = min(self.max_workers, -(-total_issues // self.page_size))
+        if shard_count <= 1:
+            return [(None, None)]
+
+        positions = [shard * total_issues // shard_count - 1 for shard in range(1, shard_count)]
+        with ThreadPoolExecutor(max_workers=len(positions)) as executor:
+            pages = list(executor.map(lambda position: self.fetch_page(ordered, position, 1, 'key', query_name=jql_filter), positions))
+        # Issues that left the query since the count can leave a position empty; one shard is always correct
+        if not all(page.get('issues') for page in pages):
+            return [(None, None)]
+        bounds = sorted({page['issues'][0].id for page in pages})
+        return list(zip([None] + bounds, bounds + [None]))
+
+    def iter_issue_pages_keyset(self, jql_query, fields=None):
+        # Keyset pagination: 'ORDER BY id' and 'id > last seen' instead of startAt, so deep pages cost the same
+        # as the first and issues changing mid-scan are neither skipped nor repeated. Each id-range shard keeps
+        # one page in flight; pages are handed out round-robin and deduplicated by issue key.
+        jql_filter = ORDER_BY_PATTERN.sub('', jql_query)
+        shards = self.id_shards(jql_filter)
+        seen_keys = set()
+        with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            window = deque((upper_id, executor.submit(self.fetch_keyset_page, jql_filter, after_id, upper_id, self.page_size, fields))
+                           for after_id, upper_id in shards)
+            while window:
+                upper_id, future = window.popleft()
+                page = future.result()
+                issues = page.get('issues', [])
+                # 'total' counts everything left in the shard, so a page holding all of it is the last one
+                if issues and len(issues) < page.get('total', 0):
+                    window.append((upper_id, executor.submit(self.fetch_keyset_page, jql_filter, issues[-1].id, upper_id,
+                                                             self.page_size, fields)))
+                new_issues = [issue for issue in issues if issue.key not in seen_keys]
+                seen_keys.update(issue.key for issue in new_issues)
+                yield new_issues
+
+    def iter_issues(self, jql_query, fields=None):
+        for page in self.iter_issue_pages(jql_query, fields):
+            yield from page
+
+    def fetch_all_pages(self, jql_query, fields=None):
+        return list(self.iter_issues(jql_query, fields))
+
+    def fetch_and_sort_data(self, jql_query, fields=None):
+        try:
+            return self.fetch_all_pages(jql_query, fields)
+        except requests.exceptions.RequestException as e:
+            logging.error("Jira API request failed for '%s': %s", jql_query, str(e))
+            raise
 
-            # Calculate overall fixed issues and gerrit issues
-            overall_fixed_issues += report_layout.loc['Fixed', ('Regression', priority)] + report_layout.loc['Fixed', ('Exploratory', priority)]
-            overall_gerrit_issues += report_layout.loc['GerritFix', ('Regression', priority)] + report_layout.loc['GerritFix', ('Exploratory', priority)]
+    def fetch_cached(self, jql_query, fields=None):
+        if self.cache is None:
+            return self.fetch_and_sort_data(jql_query, fields)
 
-        # Calculate overall percentages using overall values
-        overall_noise_percentage = (overall_noise_issues / overall_resolved) * 100
-        overall_fixed_percentage = (overall_fixed_issues / overall_resolved) * 100
-        overall_gerrit_percentage = (overall_gerrit_issues / overall_resolved) * 100
+        cache_key = self.cache.make_key(jql_query, fields, self.api_url, self.auth[0] if self.auth else None)
+        try:
+            entry = self.cache.get(cache_key)
+            if entry is not None and self.cache.is_fresh(entry):
+                self.instrumentation.record_cache_hit(jql_query)
+                return entry['issues']
 
-        # Calculate overall resolution percentage using overall values
-        overall_resolution_percentage = (overall_resolved / overall_bugs_raised) * 100
+            if entry is not None and entry['last_sync']:
+                issues = self.refresh_cached_issues(jql_query, fields, entry)
+            else:
+                issues = self.fetch_all_pages(jql_query, fields)
 
-        # Set the overall percentages in the report_layout under the "Overall" category for each priority
-        for priority in priorities:
-            report_layout.loc["Noise%", ('Overall')] = f"{overall_noise_percentage:.2f}%"
-            report_layout.loc["Fixed%", ('Overall')] = f"{overall_fixed_percentage:.2f}%"
-            report_layout.loc["Gerrit%", ('Overall')] = f"{overall_gerrit_percentage:.2f}%"
-            report_layout.loc["Resolution%", ('Overall')] = f"{overall_resolution_percentage:.2f}%"
+            self.cache.put(cache_key, issues, newest_updated(issue.updated for issue in issues))
+            return issues
+        except requests.exceptions.RequestException as e:
+            logging.error("Jira API request failed for '%s': %s", jql_query, str(e))
+            raise
 
-    def fetch_and_sort_data(self, jql_query):
+    def fetch_issue_frame(self, jql_query, fields=None, filter_columns=False):
+        if self.cache is not None:
+            return self.issues_frame(None, None, self.fetch_cached(jql_query, fields), filter_columns)
+        try:
+            # Stream pages straight into the columnar table; each page's records are dropped once they are read
+            return self.issues_frame(None, None, self.iter_issues(jql_query, fields), filter_columns)
+        except requests.exceptions.RequestException as e:
+            logging.error("Jira API request failed for '%s': %s", jql_query, str(e))
+            raise
+
+    def refresh_cached_issues(self, jql_query, fields, entry):
+        # Ask only for issues changed since the last sync and merge them into the cached copy by key
+        jql_filter = ORDER_BY_PATTERN.sub('', jql_query)
+        changed_issues = self.fetch_all_pages(f'({jql_filter}) AND updated >= "{entry["last_sync"]}"', fields)
+
+        merged = {issue.key: issue for issue in entry['issues']}
+        merged.update((issue.key, issue) for issue in changed_issues)
+
+        # Issues that stopped matching the query never show up in the delta, so fall back to a full fetch
+        # whenever the merged set no longer agrees with the server-side total
+        if len(merged) != self.fetch_page(jql_query, 0, 0).get('total', 0):
+            return self.fetch_all_pages(jql_query, fields)
+        return list(merged.values())
+
+    def sync_snapshot(self, snapshot_key, jql_query, end_date):
+        # Bring one template's snapshot up to date; returns the number of issues applied
+        state = self.snapshots.state(snapshot_key)
         try:
-            issues = []
-            start_at = 0
-            max_results = 100  # Set maxResults to your desired value
-            total_issues = None
-
-            while total_issues is None or start_at < total_issues:
-                response = requests.get(
-                    self.api_url,
-                    auth=self.auth,
-                    params={'jql': jql_query, 'startAt': start_at, 'maxResults': max_results}
-                )
-                response.raise_for_status()
-                response_data = response.json()
-
-                if total_issues is None:
-                    total_issues = response_data.get('total', 0)
-
-                issues.extend(response_data.get('issues', []))
-                start_at += max_results
+            if not self.snapshots.needs_full_sync(state, end_date):
+                jql_filter = ORDER_BY_PATTERN.sub('', jql_query)
+                changed_issues = self.iter_issues(f'({jql_filter}) AND updated >= "{state["watermark"]}"', SNAPSHOT_FIELDS)
+                applied = self.snapshots.apply(snapshot_key, end_date, changed_issues)
 
-            return issues
+                # Issues that stopped matching, or that a longer period newly includes without a recent update,
+                # are not in the delta; resync whenever the snapshot no longer agrees with the server-side total
+                if self.snapshots.issue_count(snapshot_key) == self.fetch_page(jql_query, 0, 0).get('total', 0):
+                    return applied
+
+            return self.snapshots.apply(snapshot_key, end_date, self.iter_issues(jql_query, SNAPSHOT_FIELDS), full=True)
         except requests.exceptions.RequestException as e:
-            logging.error("Jira API request failed: %s", str(e))
-            return []
-        
+            logging.error("Jira API request failed for '%s': %s", jql_query, str(e))
+            raise
+
+    def sync_snapshots(self, templates, start_date, end_date):
+        # Counts come straight from the stored per-priority aggregates; issue frames are rebuilt from the
+        # snapshot only where per-issue data is needed (defect ages, issue export)
+        snapshot_keys = {name: self.snapshots.make_key(os.path.abspath(self.json_file_path), name, template, start_date)
+                         for name, template in templates.items()}
+        jobs = {name: partial(self.sync_snapshot, snapshot_keys[name], render_query(template, start_date, end_date), end_date)
+                for name, template in templates.items()}
+        with self.instrumentation.phase('snapshot_sync'):
+            applied = self.run_queries(jobs)
+
+        counts = pd.DataFrame(
+            [(category, sub_query, self.priority_bucket(priority), count)
+             for (category, sub_query), snapshot_key in snapshot_keys.items() if sub_query in REPORT_SUB_QUERIES
+             for priority, count in self.snapshots.priority_counts(snapshot_key).items()],
+            columns=['category', 'sub_query', 'priority', 'count'])
+        frames = {name: self.issues_frame(None, None, self.snapshots.issues(snapshot_key))
+                  for name, snapshot_key in snapshot_keys.items() if name[1] in DEFECT_QUERIES or self.export_issues}
+
+        print(f"Snapshots: {sum(applied.values())} changed issues applied")
+        return counts, frames
+
+    def priority_query(self, jql_query, priority):
+        # Narrow a query to one priority bucket; ordering is irrelevant for a count
+        jql_filter = ORDER_BY_PATTERN.sub('', jql_query)
+        return f"({jql_filter}) AND {PRIORITY_CLAUSES[priority]}"
+
+    def reset_query_memo(self):
+        if self.owns_memo:
+            self.query_memo.reset()
+
+    def memoized_fetch(self, fetch, jql_query, **kwargs):
+        return self.query_memo.fetch(fetch, jql_query, **kwargs)
+
+    def run_queries(self, jobs):
+        # Submit every fetch as soon as the report starts and collect the results once they are all done.
+        # The jobs are independent; the client's request slots bound how many HTTP calls are actually in flight.
+        with ThreadPoolExecutor(max_workers=max(len(jobs), 1)) as executor:
+            futures = {name: executor.submit(job) for name, job in jobs.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    def priority_bucket(self, priority_name):
+        return priority_name if priority_name in ('Blocker', 'Critical') else 'Others'
+
+    def issues_frame(self, category, sub_query, issues, filter_columns=False):
+        # Normalize IssueRecords into a columnar table the aggregations can work on. 'issues' may be any
+        # iterable, including the streaming iter_issues, and is consumed in a single pass.
+        # filter_columns adds status, resolution and labels for local JQL filtering.
+        keys, priority_names, created_dates, resolved_dates = [], [], [], []
+        statuses, resolutions, labels = [], [], []
+        for issue in issues:
+            keys.append(issue.key)
+            priority_names.append(issue.priority)
+            created_dates.append(issue.created)
+            resolved_dates.append(issue.resolutiondate)
+            if filter_columns:
+                statuses.append(issue.status)
+                resolutions.append(issue.resolution)
+                labels.append(issue.labels)
+
+        frame = pd.DataFrame({
+            'category': category,
+            'sub_query': sub_query,
+            'key': keys,
+            'priority_name': priority_names,
+            # One byte per issue instead of a pointer; the buckets are the only values the counts group by
+            'priority': pd.Categorical([self.priority_bucket(priority_name) for priority_name in priority_names], categories=PRIORITIES),
+            'created': self.parse_timestamps(created_dates),
+            'created_local': self.parse_local_timestamps(created_dates),
+            'resolved': self.parse_timestamps(resolved_dates)
+        }, columns=['category', 'sub_query', 'key', 'priority_name', 'priority', 'created', 'created_local', 'resolved'])
+        if filter_columns:
+            frame['status'] = pd.Series(statuses, dtype=object)
+            frame['resolution'] = pd.Series(resolutions, dtype=object)
+            frame['labels'] = pd.Series(labels, dtype=object)
+        return frame
+
+    def parse_timestamps(self, values):
+        # Parse a whole column of Jira timestamps into datetime64 in one call instead of strptime per issue
+        return pd.to_datetime(pd.Series(values, dtype=object), format=JIRA_TIMESTAMP_FORMAT, utc=True)
+
+    def parse_local_timestamps(self, values):
+        # Wall-clock time in the timezone Jira rendered it in, which is also how JQL compares date literals
+        return pd.to_datetime(pd.Series(values, dtype=object).str.slice(0, 23), format="%Y-%m-%dT%H:%M:%S.%f")
+
+    def count_matrix(self, counts, sub_queries):
+        # counts has one row per (category, sub_query, priority) with its issue count
+        cells = pd.MultiIndex.from_product([sub_queries, CATEGORIES, PRIORITIES], names=['sub_query', 'category', 'priority'])
+        totals = counts.groupby(['sub_query', 'category', 'priority'])['count'].sum().reindex(cells, fill_value=0)
+
+        matrix = totals.unstack(['category', 'priority']).reindex(columns=pd.MultiIndex.from_product([CATEGORIES, PRIORITIES]))
+        matrix[('Overall', '')] = matrix.sum(axis=1)
+        return matrix
+
     def fetch_resolution_data(self, jql_query):
         try:
-            response = requests.get(
-                self.api_url,
-                auth=self.auth,
-                params={'jql': jql_query}
-            )
-            response.raise_for_status()
-            resolution_data = response.json().get('issues', [])
+            resolution_data = decode_page(self.client.search({'jql': jql_query}, self.instrumentation)).get('issues', [])
             return resolution_data
         except requests.exceptions.RequestException as e:
             logging.error("Jira API request failed for Resolution data: %s", str(e))
-            return []
+            raise
 
     def create_report_layout(self):
         columns = pd.MultiIndex.from_tuples([
@@ -125,187 +481,72 @@ class JiraReportGenerator:
 
         data = [[0] * len(columns) for _ in range(len(index))]
 
-        df = pd.DataFrame(data, columns=columns, index=index)
+        df = pd.DataFrame(data, columns=columns, index=index, dtype=object)
 
         return df
 
     def validate_report_data(self, report_layout, data, common_sub_queries, start_date, end_date):
-        success = True
-
-        for sub_query in common_sub_queries:
-            regression_sub_query = data["Regression"].get(sub_query)
-            exploratory_sub_query = data["Exploratory"].get(sub_query)
-
-            if regression_sub_query is None:
-                logging.error("Regression JQL query for '%s' not found in JSON data.", sub_query)
-                success = False
-            if exploratory_sub_query is None:
-                logging.error("Exploratory JQL query for '%s' not found in JSON data.", sub_query)
-                success = False
-
-        return success
+        return not log_template_problems(data)
     
     def calculate_metrics(self, report_layout):
-
-
-        priorities = ['Blocker', 'Critical', 'Others']
-        possible_resolutions = [
-            "Fixed", "Done", "Completed", "Resolved", "Verified", 
-            "Implemented", "Closed", "Cannot Reproduce", "Duplicate"
-        ]
-
-        for priority in priorities:
-            noise_issues = report_layout.loc['Noise', ('Regression', priority)]
-            resolved_issues = report_layout.loc['Resolved', ('Regression', priority)]
-
-            # Check if the denominator is not zero before calculating noise_percentage
-            if resolved_issues != 0:
-                noise_percentage = (noise_issues / resolved_issues) * 100
-                report_layout.loc["Noise%", ('Regression', priority)] = f"{noise_percentage:.2f}%"
-            else:
-                report_layout.loc["Noise%", ('Regression', priority)] = '0.0%'  # Set to 0 if no resolved issues
-
-            fixed_issues = report_layout.loc['Fixed', ('Regression', priority)]
-            resolved_issues = report_layout.loc['Resolved', ('Regression', priority)]
-            gerrit_issues = report_layout.loc['GerritFix', ('Regression', priority)]
-
-            # Check if the denominator is not zero before calculating percentages
-            if resolved_issues != 0:
-                fixed_percentage = (fixed_issues / resolved_issues) * 100
-                gerrit_percentage = (gerrit_issues / resolved_issues) * 100
-
-                report_layout.loc["Fixed%", ('Regression', priority)] = f"{fixed_percentage:.2f}%"   # Fixed%
-                report_layout.loc["Gerrit%", ('Regression', priority)] = f"{gerrit_percentage:.2f}%"  # Gerrit%
-            else:
-                report_layout.loc["Fixed%", ('Regression', priority)] = '0.0%'  # Set to '0%' if no resolved issues
-                report_layout.loc["Gerrit%", ('Regression', priority)] = '0.0%'  # Set to '0%' if no resolved issues
-
-            # Calculate Resolution% as Resolved / BugsRaised
-            bugs_raised = report_layout.loc['BugsRaised', ('Regression', priority)]
-            resolved_issues = report_layout.loc['Resolved', ('Regression', priority)]
-
-            if bugs_raised > 0:
-                resolution_percentage = (resolved_issues / bugs_raised) * 100
-            else:
-                resolution_percentage = 0
-
-            report_layout.loc["Resolution%", ('Regression', priority)] = f"{resolution_percentage:.2f}%"
-
-
-           
-        # Calculate metrics for "Exploratory" category
-        for priority in priorities:
-            noise_issues = report_layout.loc['Noise', ('Exploratory', priority)]
-            resolved_issues = report_layout.loc['Resolved', ('Exploratory', priority)]
-
-            # Check if the denominator is not zero before calculating noise_percentage
-            if resolved_issues != 0:
-                noise_percentage = (noise_issues / resolved_issues) * 100
-                report_layout.loc["Noise%", ('Exploratory', priority)] = f"{noise_percentage:.2f}%"
-            else:
-                report_layout.loc["Noise%", ('Exploratory', priority)] = '0.0%'  # Set to 0 if no resolved issues
-
-            fixed_issues = report_layout.loc['Fixed', ('Exploratory', priority)]
-            resolved_issues = report_layout.loc['Resolved', ('Exploratory', priority)]
-            gerrit_issues = report_layout.loc['GerritFix', ('Exploratory', priority)]
-
-            # Check if the denominator is not zero before calculating percentages
-            if resolved_issues != 0:
-                fixed_percentage = (fixed_issues / resolved_issues) * 100
-                gerrit_percentage = (gerrit_issues / resolved_issues) * 100
-
-                report_layout.loc["Fixed%", ('Exploratory', priority)] = f"{fixed_percentage:.2f}%"   # Fixed%
-                report_layout.loc["Gerrit%", ('Exploratory', priority)] = f"{gerrit_percentage:.2f}%"  # Gerrit%
-            else:
-                report_layout.loc["Fixed%", ('Exploratory', priority)] = '0.0%'  # Set to '0%' if no resolved issues
-                report_layout.loc["Gerrit%", ('Exploratory', priority)] = '0.0%'  # Set to '0%' if no resolved issues
-
-            # Calculate Resolution% as Resolved / BugsRaised
-            bugs_raised = report_layout.loc['BugsRaised', ('Exploratory', priority)]
-            resolved_issues = report_layout.loc['Resolved', ('Exploratory', priority)]
-
-            if bugs_raised > 0:
-                resolution_percentage = (resolved_issues / bugs_raised) * 100
-            else:
-                resolution_percentage = 0
-
-            report_layout.loc["Resolution%", ('Exploratory', priority)] = f"{resolution_percentage:.2f}%"
-
-
-    def calculate_average_defect_age(self, report_layout, resolved_defect_data, unresolved_defect_data):
-        priority_groups = {
-            'Blocker': ['Blocker'],
-            'Critical': ['Critical'],
-            'Others': ['Major', 'Minor', 'Trivial']
-        }
-
-        # Initialize dictionaries to store sums and counts for each priority group
-        resolved_defect_age_sums = {group: 0 for group in priority_groups}
-        unresolved_defect_age_sums = {group: 0 for group in priority_groups}
-        resolved_defect_counts = {group: 0 for group in priority_groups}
-        unresolved_defect_counts = {group: 0 for group in priority_groups}
-
-        for issue in resolved_defect_data:
-            priority = issue['fields']['priority']['name']
-            created_date = datetime.strptime(issue['fields']['created'], "%Y-%m-%dT%H:%M:%S.%f%z")
-            resolved_date = datetime.strptime(issue['fields']['resolutiondate'], "%Y-%m-%dT%H:%M:%S.%f%z")
-            age = (resolved_date - created_date).days
-            for group, group_priorities in priority_groups.items():
-                if priority in group_priorities:
-                    resolved_defect_age_sums[group] += age
-                    resolved_defect_counts[group] += 1
-
-        for issue in unresolved_defect_data:
-            priority = issue['fields']['priority']['name']
-            created_date = datetime.strptime(issue['fields']['created'], "%Y-%m-%dT%H:%M:%S.%f%z")
-            age = (datetime.now(timezone.utc) - created_date).days
-            for group, group_priorities in priority_groups.items():
-                if priority in group_priorities:
-                    unresolved_defect_age_sums[group] += age
-                    unresolved_defect_counts[group] += 1
-
-        for group in priority_groups:
-            resolved_defect_age_avg = resolved_defect_age_sums[group] / max(resolved_defect_counts[group], 1)
-            unresolved_defect_age_avg = unresolved_defect_age_sums[group] / max(unresolved_defect_counts[group], 1)
-
-            report_layout.loc["Resolved-Defect", ('Regression', group)] = f"{resolved_defect_age_avg:.2f} "
-            report_layout.loc["Un-Resolved-Defect", ('Regression', group)] = f"{unresolved_defect_age_avg:.2f} "
-
-            # Separate calculation and assignment for "Exploratory"
-            report_layout.loc["Resolved-Defect", ('Exploratory', group)] = f"{resolved_defect_age_avg:.2f} "
-            report_layout.loc["Un-Resolved-Defect", ('Exploratory', group)] = f"{unresolved_defect_age_avg:.2f} "
-
-         # Calculate total averages for both "Regression" and "Exploratory"
-        total_resolved_regression_age_sum = sum(resolved_defect_age_sums[group] for group in priority_groups)
-        total_unresolved_regression_age_sum = sum(unresolved_defect_age_sums[group] for group in priority_groups)
-        total_resolved_regression_count = sum(resolved_defect_counts[group] for group in priority_groups)
-        total_unresolved_regression_count = sum(unresolved_defect_counts[group] for group in priority_groups)
-
-        total_resolved_regression_age_avg = total_resolved_regression_age_sum / max(total_resolved_regression_count, 1)
-        total_unresolved_regression_age_avg = total_unresolved_regression_age_sum / max(total_unresolved_regression_count, 1)
-
-        # Assign total averages to "Overall" in your layout
-        report_layout.loc["Resolved-Defect", ('Overall')] = f"{total_resolved_regression_age_avg:.2f}"
-        report_layout.loc["Un-Resolved-Defect", ('Overall')] = f"{total_unresolved_regression_age_avg:.2f}"
-
-        # Similarly, calculate and assign total averages for "Exploratory" in your layout
-        total_resolved_exploratory_age_sum = sum(resolved_defect_age_sums[group] for group in priority_groups)
-        total_unresolved_exploratory_age_sum = sum(unresolved_defect_age_sums[group] for group in priority_groups)
-        total_resolved_exploratory_count = sum(resolved_defect_counts[group] for group in priority_groups)
-        total_unresolved_exploratory_count = sum(unresolved_defect_counts[group] for group in priority_groups)
-
-        total_resolved_exploratory_age_avg = total_resolved_exploratory_age_sum / max(total_resolved_exploratory_count, 1)
-        total_unresolved_exploratory_age_avg = total_unresolved_exploratory_age_sum / max(total_unresolved_exploratory_count, 1)
-
-        report_layout.loc["Resolved-Defect", ('Overall')] = f"{total_resolved_exploratory_age_avg:.2f}"
-        report_layout.loc["Un-Resolved-Defect", ('Overall')] = f"{total_unresolved_exploratory_age_avg:.2f}"
+        # Percentage rows for every column at once; the Overall column holds the summed counts,
+        # so the same division yields the overall percentages
+        counts = report_layout.loc[['BugsRaised', 'Resolved', 'Fixed', 'GerritFix', 'Noise']].astype(float)
+        resolved = counts.loc['Resolved']
+        bugs_raised = counts.loc['BugsRaised']
+
+        # Percentages stay numbers (12.5 for 12.5%, 0 when the denominator is 0) so exports are machine-readable
+        def percentage(numerator, denominator):
+            return (numerator / denominator.where(denominator != 0) * 100).round(2).fillna(0.0)
+
+        report_layout.loc['Noise%'] = percentage(counts.loc['Noise'], resolved)
+        report_layout.loc['Fixed%'] = percentage(counts.loc['Fixed'], resolved)
+        report_layout.loc['Gerrit%'] = percentage(counts.loc['GerritFix'], resolved)
+        report_layout.loc['Resolution%'] = percentage(resolved, bugs_raised)
+
+    def defect_ages(self, frame, now=None):
+        # Age in whole days per issue: created -> resolutiondate, or created -> now for unresolved issues
+        end = frame['resolved'] if now is None else now
+        ages = pd.DataFrame({
+            'group': frame['priority_name'].map(AGE_PRIORITY_GROUPS),
+            'age': (end - frame['created']).dt.days
+        })
+        return ages.dropna()
+
+    def age_row(self, ages):
+        # Average age in days per priority group, repeated for both categories, plus the overall average
+        averages = ages.groupby('group')['age'].mean().reindex(PRIORITIES, fill_value=0)
+        group_cells = [round(float(average), 2) for average in averages]
+        overall_average = round(float(ages['age'].mean()), 2) if len(ages) else 0.0
+        return group_cells * len(CATEGORIES) + [overall_average]
+
+    def defect_age_statistics(self, resolved_ages, unresolved_ages):
+        # Mean hides the long tail, so also report median (p50) and p90 per priority group
+        statistics = {}
+        for kind, ages in (('Resolved', resolved_ages), ('Un-Resolved', unresolved_ages)):
+            ages = pd.concat([ages, ages.assign(group='Overall')])
+            grouped = ages.groupby('group')['age']
+            quantiles = grouped.quantile([0.5, 0.9]).unstack().rename(columns={0.5: 'p50', 0.9: 'p90'})
+            statistics[kind] = grouped.agg(['count', 'mean']).join(quantiles).reindex(
+                index=PRIORITIES + ['Overall'], columns=['count', 'mean', 'p50', 'p90']).fillna({'count': 0})
+        return pd.concat(statistics, names=['Defect', 'Priority'])
+
+    def calculate_average_defect_age(self, report_layout, resolved_defects, unresolved_defects, now=None):
+        # resolved_defects / unresolved_defects are issue frames as built by issues_frame
+        resolved_ages = self.defect_ages(resolved_defects)
+        unresolved_ages = self.defect_ages(unresolved_defects, now=now or pd.Timestamp.now(tz=timezone.utc))
+
+        report_layout.loc["Resolved-Defect"] = self.age_row(resolved_ages)
+        report_layout.loc["Un-Resolved-Defect"] = self.age_row(unresolved_ages)
+
+        return self.defect_age_statistics(resolved_ages, unresolved_ages)
 
     def calculate_age(self, issue):
-        created_date_str = issue['fields']['created']
-        resolved_date_str = issue['fields'].get('resolutiondate')  # Use .get() to handle None
+        created_date_str = issue.created
+        resolved_date_str = issue.resolutiondate  # None when not resolved
         if resolved_date_str:
-            created_date = datetime.strptime(created_date_str, "%Y-%m-%dT%H:%M:%S.%f%z")
-            resolved_date = datetime.strptime(resolved_date_str, "%Y-%m-%dT%H:%M:%S.%f%z")
+            created_date = datetime.strptime(created_date_str, JIRA_TIMESTAMP_FORMAT)
+            resolved_date = datetime.strptime(resolved_date_str, JIRA_TIMESTAMP_FORMAT)
             age = (resolved_date - created_date).days
             return age
         else:
@@ -318,180 +559,773 @@ class JiraReportGenerator:
     
         return f"{age:.2f} days"
 
-    def generate_report(self, start_date, end_date):
-        try:
-            with open(self.json_file_path, 'r') as json_file:
-                data = json.load(json_file)
-        except FileNotFoundError as e:
-            logging.error("JSON file not found: %s", str(e))
-            return
-
-        api_credentials = data["api_credentials"]
-        api_username = api_credentials["api_username"]
-        api_password = api_credentials["api_password"]
-        api_url = api_credentials["api_url"]
-        auth = (api_username, api_password)
-
-        common_sub_queries = ["BugsRaised", "Resolved", "Fixed", "GerritFix", "Noise", "Resolution"]
-
-        # Create an empty DataFrame for JQL queries
-        jql_queries_data = {
-            "Regression": {},
-            "Exploratory": {}
-        }
-        jql_queries_df = pd.DataFrame(jql_queries_data)
-
-        report_layout = self.create_report_layout()
-
-        # Fetch Resolved Defect and Un-Resolved Defect data
-        resolved_defect_query = data["Regression"]["Resolved_Defect"].replace("{{start_date}}", start_date).replace("{{end_date}}", end_date)
-        unresolved_defect_query = data["Regression"]["Un-Resolved_Defect"].replace("{{start_date}}", start_date).replace("{{end_date}}", end_date)
-
-        resolved_defect_data = self.fetch_and_sort_data(resolved_defect_query)
-        unresolved_defect_data = self.fetch_and_sort_data(unresolved_defect_query)
-
-        # Sort the issues based on Priority
-        resolved_defect_data.sort(key=lambda x: x['fields']['priority']['name'])
-        unresolved_defect_data.sort(key=lambda x: x['fields']['priority']['name'])
-
-        # Calculate defect age for Resolved Defect and Un-Resolved Defect
-        for issue in resolved_defect_data:
-            created_date = datetime.strptime(issue['fields']['created'], "%Y-%m-%dT%H:%M:%S.%f%z")
-            updated_date = datetime.strptime(issue['fields']['updated'], "%Y-%m-%dT%H:%M:%S.%f%z")
-            age = (updated_date - created_date).days
-            issue['defect_age'] = age
-
-        today = datetime.now(timezone.utc)
-        for issue in unresolved_defect_data:
-            created_date = datetime.strptime(issue['fields']['created'], "%Y-%m-%dT%H:%M:%S.%f%z")
-            age = (today - created_date).days
-            issue['defect_age'] = age
-
-        if self.validate_report_data(report_layout, data, common_sub_queries, start_date, end_date):
-            for sub_query in common_sub_queries:
-                regression_sub_query = data["Regression"][sub_query].replace("{{start_date}}", start_date).replace("{{end_date}}", end_date)
-                exploratory_sub_query = data["Exploratory"][sub_query].replace("{{start_date}}", start_date).replace("{{end_date}}", end_date)
-
-                regression_data = self.fetch_and_sort_data(regression_sub_query)
-                exploratory_data = self.fetch_and_sort_data(exploratory_sub_query)
-
-                for priority in ['Blocker', 'Critical', 'Others']:
-                    if priority == 'Others':
-                        priority_issues = [issue for issue in regression_data if issue['fields']['priority']['name'] not in ['Blocker', 'Critical']]
-                    else:
-                        priority_issues = [issue for issue in regression_data if issue['fields']['priority']['name'] == priority]
-                    report_layout.loc[sub_query, ('Regression', priority)] = len(priority_issues)
-
-                    if priority == 'Others':
-                        priority_issues = [issue for issue in exploratory_data if issue['fields']['priority']['name'] not in ['Blocker', 'Critical']]
-                    else:
-                        priority_issues = [issue for issue in exploratory_data if issue['fields']['priority']['name'] == priority]
-                    report_layout.loc[sub_query, ('Exploratory', priority)] = len(priority_issues)
-
-                overall_regression = sum(report_layout.loc[sub_query, ('Regression', priority)] for priority in ['Blocker', 'Critical', 'Others'])
-                overall_exploratory = sum(report_layout.loc[sub_query, ('Exploratory', priority)] for priority in ['Blocker', 'Critical', 'Others'])
-                report_layout.loc[sub_query, ('Overall', '')] = overall_regression + overall_exploratory
-
-                # Fetch Resolution data
-                resolution_sub_query = data["Regression"]["Resolution"].replace("{{start_date}}", start_date).replace("{{end_date}}", end_date)
-                resolution_data = self.fetch_and_sort_data(resolution_sub_query)
-
-                # Update report layout with Resolution data
-                for priority in ['Blocker', 'Critical', 'Others']:
-                    # Calculate Resolution%
-                    bugs_raised = report_layout.loc['BugsRaised', ('Regression', priority)]
-                    resolution_count = len(resolution_data)
-                    resolution_percentage = (resolution_count / bugs_raised) * 100
-
-                    # Update the corresponding cell in the DataFrame
-                    report_layout.loc["Resolution%", ('Regression', priority)] = resolution_percentage
-
-                    # Update JQL queries DataFrame with actual JQL queries
-                    jql_queries_df.loc[sub_query, ('Regression')] = regression_sub_query
-                    jql_queries_df.loc[sub_query, ('Exploratory')] = exploratory_sub_query
-            
-            # Remove the "Resolution" row from the report
-            report_layout = report_layout.drop("Resolution", errors='ignore')
-
-            resolved_defect_data = self.fetch_and_sort_data(resolved_defect_query)
-            unresolved_defect_data = self.fetch_and_sort_data(unresolved_defect_query)
-
-            # Calculate metrics (Fixed%, Gerrit%, etc.)
+    def output_paths(self, start_date, end_date, output_dir=None):
+        # Path prefixes of the report and JQL query files; each exporter adds its own extension
+        if output_dir is None:
+            return ("/home/ANT.AMAZON.COM/avinaks/Downloads/Report_Script/report",
+                    "/home/ANT.AMAZON.COM/avinaks/Downloads/Report_Script/jql_queries")
+
+        # One pair of files per queries file and period, so batch runs never overwrite each other
+        queries_name = os.path.splitext(os.path.basename(self.json_file_path))[0]
+        prefix = os.path.join(output_dir, f"{queries_name}_{start_date}_{end_date}")
+        return f"{prefix}_report", f"{prefix}_jql_queries"
+
+    def load_queries(self):
+        if self.queries is not None:
+            return self.queries
+        return read_queries(self.json_file_path)
+
+    def count_issues(self, frames):
+        # frames maps (category, sub_query) to an issue frame; one count row per priority bucket comes back
+        issues = pd.concat([frames[(category, sub_query)].assign(category=category, sub_query=sub_query)
+                            for category in CATEGORIES for sub_query in REPORT_SUB_QUERIES], ignore_index=True)
+        return issues.groupby(['category', 'sub_query', 'priority'], observed=True).size().rename('count').reset_index()
+
+    def issue_detail(self, frames):
+        # frames maps (category, sub_query) to an issue frame; one row per issue and query comes back
+        return pd.concat([frame.assign(category=category, sub_query=sub_query) for (category, sub_query), frame in frames.items()],
+                         ignore_index=True)[ISSUE_DETAIL_COLUMNS]
+
+    def build_report(self, report_layout, counts, resolved_defects, unresolved_defects, now=None):
+        # Fill every count cell of the layout in one step
+        with self.instrumentation.phase('count_matrix'):
+            count_matrix = self.count_matrix(counts, REPORT_SUB_QUERIES)
+            report_layout.loc[REPORT_SUB_QUERIES, :] = count_matrix.loc[REPORT_SUB_QUERIES, report_layout.columns].values
+
+        # Calculate metrics (Noise%, Fixed%, Gerrit%, Resolution%), including the Overall column
+        with self.instrumentation.phase('calculate_metrics'):
             self.calculate_metrics(report_layout)
 
-            # Calculate average defect age for resolved issues
-            self.calculate_average_defect_age(report_layout, resolved_defect_data, unresolved_defect_data)
-
-            # Calculate average defect age for unresolved issues
-            self.calculate_average_defect_age(report_layout, resolved_defect_data, unresolved_defect_data)
-
-            # Calculate overall percentages for "Fixed%", "Gerrit%", and "Resolution%"
-            self.calculate_overall_metrics(report_layout) 
-
-            # Remove "days" from defect age values
-            report_layout = report_layout.applymap(lambda x: str(x).rstrip("days"))
-
-            # Handle "nan%" issue by replacing "nan" with an empty string
-            report_layout = report_layout.fillna('')
-
-
+        # Calculate average defect age for resolved and unresolved issues
+        with self.instrumentation.phase('calculate_average_defect_age'):
+            defect_age_stats = self.calculate_average_defect_age(report_layout, resolved_defects, unresolved_defects, now)
+
+        return report_layout, defect_age_stats
+
+    def save_report(self, data, report_layout, defect_age_stats, start_date, end_date, output_dir=None, issue_frames=None):
+        # Print the summary in one call so reports generated side by side in batch mode don't interleave
+        print(f"{report_layout}\n"
+              f"Defect age distribution (days):\n{defect_age_stats.round(2)}\n"
+              f"Query memo: {self.query_memo.hits} hits, {self.query_memo.misses} misses")
+
+        report_prefix, jql_queries_prefix = self.output_paths(start_date, end_date, output_dir)
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+
+        jql_queries_df = pd.DataFrame({
+            "Regression": data["Regression"],
+            "Exploratory": data["Exploratory"]
+        })
+        tables = [
+            ("Report", report_layout, report_prefix, True),
+            ("Defect ages", defect_age_stats, f"{report_prefix}_defect_ages", True),
+            ("JQL queries", jql_queries_df, jql_queries_prefix, False)
+        ]
+        if self.export_issues and issue_frames is not None:
+            tables.append(("Issues", self.issue_detail(issue_frames), f"{report_prefix}_issues", False))
+
+        # Every table in every requested format (xlsx, csv, parquet)
+        for exporter in self.exporters:
+            with self.instrumentation.phase(f'export_{exporter.extension}'):
+                for title, frame, path_prefix, index in tables:
+                    print(f"{title} saved to {exporter.write(frame, path_prefix, index)}")
+
+    def save_timings(self, start_date, end_date, output_dir=None):
+        report_prefix, _ = self.output_paths(start_date, end_date, output_dir)
+        json_path, csv_path = self.instrumentation.write(f"{report_prefix}_timings", self.query_memo)
+        slowest = ", ".join(f"{stats['latency_seconds']:.2f}s over {stats['requests']} requests"
+                            for stats in self.instrumentation.slowest_queries(1))
+        print(f"Timings saved to {json_path} and {csv_path}" + (f" (slowest query: {slowest})" if slowest else ""))
+
+    def planned_fetches(self, data, start_date, end_date, fetch_range=None):
+        # (fetch, jql_query, kwargs, created bounds) per report job. With fetch_range, a wider (start, end) range
+        # shared with overlapping periods, issue queries whose period dates are only in created clauses are
+        # fetched over that range once and this period is sliced out by the created bounds; None otherwise.
+        fetches = {}
+        for (category, sub_query), template in report_templates(data).items():
+            jql_query = render_query(template, start_date, end_date)
+            if sub_query in REPORT_SUB_QUERIES and self.count_only:
+                for priority in PRIORITY_CLAUSES:
+                    fetches[(category, sub_query, priority)] = (self.fetch_issue_count, self.priority_query(jql_query, priority), {}, None)
+                continue
+            bounds = self.created_bounds(template) if fetch_range else None
+            if bounds is not None:
+                fetches[(category, sub_query)] = (self.fetch_created_index, render_query(template, *fetch_range), {'fields': ISSUE_FIELDS}, bounds)
+            else:
+                fetches[(category, sub_query)] = (self.fetch_issue_frame, jql_query, {'fields': ISSUE_FIELDS}, None)
+        return fetches
 
-            print(report_layout)
-            
+    def generate_report(self, start_date, end_date, output_dir=None, fetch_range=None):
+        data = self.load_queries()
+        if data is None:
+            return
 
-            # Save the report as an Excel file
-            report_filename = "/home/ANT.AMAZON.COM/avinaks/Downloads/Report_Script/report.xlsx"
-            report_layout.to_excel(report_filename)
-            print(f"Report saved to {report_filename}")
+        common_sub_queries = COMMON_SUB_QUERIES
 
-            # Save JQL queries as an Excel file
-            jql_queries = {
-                "Regression": data["Regression"],
-                "Exploratory": data["Exploratory"]
-            }
-            jql_queries_df = pd.DataFrame(jql_queries)
-            jql_queries_filename = "/home/ANT.AMAZON.COM/avinaks/Downloads/Report_Script/jql_queries.xlsx"
-            jql_queries_df.to_excel(jql_queries_filename, index=False)
-            print(f"JQL queries saved to {jql_queries_filename}")
+        self.instrumentation = Instrumentation()
+        with self.instrumentation.phase('create_report_layout'):
+            report_layout = self.create_report_layout()
+        self.reset_query_memo()
 
-            
+        if self.validate_report_data(report_layout, data, common_sub_queries, start_date, end_date):
+            if self.snapshots is not None:
+                # Same period as earlier runs: fetch and apply only the issues changed since then
+                counts, results = self.sync_snapshots(report_templates(data), start_date, end_date)
+            else:
+                # Render every JQL the report needs and fetch them all concurrently
+                fetches = self.planned_fetches(data, start_date, end_date, fetch_range)
+                jobs = {name: partial(self.memoized_fetch, fetch, jql_query, **kwargs)
+                        for name, (fetch, jql_query, kwargs, _) in fetches.items()}
+                with self.instrumentation.phase('fetch'):
+                    results = self.run_queries(jobs)
+                with self.instrumentation.phase('slice_period'):
+                    for name, (_, _, _, bounds) in fetches.items():
+                        if bounds is not None:
+                            results[name] = self.slice_created(results[name], bounds, start_date, end_date)
+
+                # Issue counts per (category, sub_query, priority bucket), whichever way they were fetched
+                if self.count_only:
+                    counts = pd.DataFrame(
+                        [(category, sub_query, priority, results[(category, sub_query, priority)])
+                         for category in CATEGORIES for sub_query in REPORT_SUB_QUERIES for priority in PRIORITIES],
+                        columns=['category', 'sub_query', 'priority', 'count'])
+                else:
+                    counts = self.count_issues(results)
+
+            report_layout, defect_age_stats = self.build_report(
+                report_layout, counts, results[('Regression', 'Resolved_Defect')], results[('Regression', 'Un-Resolved_Defect')])
+
+            # With the issue export on, every result is an issue frame
+            issue_frames = results if self.export_issues else None
+            self.save_report(data, report_layout, defect_age_stats, start_date, end_date, output_dir, issue_frames)
+            self.save_timings(start_date, end_date, output_dir)
+
+            return report_layout
 
         else:
             logging.error("Validation failed. Please check the errors in the log.")
 
-def main():
-    logging.basicConfig(level=logging.ERROR)  # Configure logging
-    json_file_path = adjust_path_for_os("json path")
-
-    api_credentials = None
+    def report_from_counts(self, data, counts, frames, start_date, end_date, output_dir=None):
+        # The aggregation half of generate_report, on counts and issue frames fetched elsewhere (see run_multi_team).
+        # frames holds the defect queries, and every query when the issue export is on.
+        self.instrumentation = Instrumentation()
+        with self.instrumentation.phase('create_report_layout'):
+            report_layout = self.create_report_layout()
+        report_layout, defect_age_stats = self.build_report(
+            report_layout, counts, frames[('Regression', 'Resolved_Defect')], frames[('Regression', 'Un-Resolved_Defect')])
+
+        issue_frames = frames if self.export_issues else None
+        self.save_report(data, report_layout, defect_age_stats, start_date, end_date, output_dir, issue_frames)
+        self.save_timings(start_date, end_date, output_dir)
+        return report_layout
+
+    def created_bounds(self, template):
+        # Operators of the template's created-date clauses, e.g. ('>=', '<='); a side is None when the template
+        # doesn't bound it. Returns None when the period dates are used anywhere else, since such a template
+        # can't be fetched once and sliced locally.
+        start_operators = START_DATE_CLAUSE.findall(template)
+        end_operators = END_DATE_CLAUSE.findall(template)
+        if (len(start_operators) > 1 or len(start_operators) != template.count("{{start_date}}")
+                or len(end_operators) > 1 or len(end_operators) != template.count("{{end_date}}")):
+            return None
+        return (start_operators[0] if start_operators else None, end_operators[0] if end_operators else None)
+
+    def fetch_created_index(self, jql_query, fields=None):
+        # Issue frame sorted by created_local, ready for slice_created
+        return self.fetch_issue_frame(jql_query, fields).sort_values('created_local', kind='mergesort')
+
+    def trend_fetches(self, data, periods):
+        # (fetch, jql_query, kwargs) per template of a trend report: each over the union of the periods
+        union_start = min(start_date for start_date, _ in periods)
+        union_end = max(end_date for _, end_date in periods)
+        return {name: (self.fetch_created_index, render_query(template, union_start, union_end), {'fields': ISSUE_FIELDS})
+                for name, template in report_templates(data).items()}
+
+    def slice_created(self, frame, bounds, start_date, end_date):
+        # frame is sorted by created_local, so a period is two binary searches using the template's operators
+        created = frame['created_local']
+        start_operator, end_operator = bounds
+        low = 0
+        high = len(frame)
+        if start_operator is not None:
+            low = created.searchsorted(pd.Timestamp(start_date), side='left' if start_operator == '>=' else 'right')
+        if end_operator is not None:
+            high = created.searchsorted(pd.Timestamp(end_date), side='right' if end_operator == '<=' else 'left')
+        return frame.iloc[low:high]
+
+    def generate_trend_report(self, periods, output_dir=None):
+        # Fetch each template once over the union of all periods, then build every period's report
+        # from an in-memory index on 'created' instead of sending one set of queries per period
+        data = self.load_queries()
+        if data is None:
+            return None
+
+        if not self.validate_report_data(None, data, COMMON_SUB_QUERIES, None, None):
+            logging.error("Validation failed. Please check the errors in the log.")
+            return None
+
+        templates = report_templates(data)
+        bounds = {name: self.created_bounds(template) for name, template in templates.items()}
+        unsliceable = [f"{category}/{sub_query}" for (category, sub_query), bound in bounds.items() if bound is None]
+        if unsliceable:
+            logging.error("Trend mode needs the period dates only in created clauses; not the case for: %s", ", ".join(unsliceable))
+            return None
+
+        union_start = min(start_date for start_date, _ in periods)
+        union_end = max(end_date for _, end_date in periods)
+
+        self.instrumentation = Instrumentation()
+        self.reset_query_memo()
+        jobs = {name: partial(self.memoized_fetch, fetch, jql_query, **kwargs)
+                for name, (fetch, jql_query, kwargs) in self.trend_fetches(data, periods).items()}
+        with self.instrumentation.phase('fetch'):
+            frames = self.run_queries(jobs)
+
+        now = pd.Timestamp.now(tz=timezone.utc)
+        reports = {}
+        for start_date, end_date in periods:
+            with self.instrumentation.phase('slice_period'):
+                period_frames = {name: self.slice_created(frame, bounds[name], start_date, end_date) for name, frame in frames.items()}
+            with self.instrumentation.phase('create_report_layout'):
+                report_layout = self.create_report_layout()
+            report_layout, defect_age_stats = self.build_report(
+                report_layout, self.count_issues(period_frames),
+                period_frames[('Regression', 'Resolved_Defect')], period_frames[('Regression', 'Un-Resolved_Defect')], now)
+
+            self.save_report(data, report_layout, defect_age_stats, start_date, end_date, output_dir, period_frames)
+            reports[(start_date, end_date)] = report_layout
+
+        self.save_timings(union_start, union_end, output_dir)
+        return reports
+
+def adjust_path_for_os(path):
+    # path_handler is a per-machine module that pulls in the platform config; load it only when a path
+    # is resolved. Without it paths are used as given (e.g. benchmarks, CI).
     try:
-        with open(adjust_path_for_os(json_file_path), 'r') as json_file:
+        from path_handler import adjust_path_for_os as adjust_path
+    except ImportError:
+        return path
+    return adjust_path(path)
 
-            data = json.load(json_file)
-            api_credentials = data["api_credentials"]
+def read_queries(json_file_path):
+    try:
+        with open(json_file_path, 'r') as json_file:
+            return json.load(json_file)
     except FileNotFoundError as e:
-        logging.error("JSON file not found: %s", str(e))    
-        return
+        logging.error("JSON file not found: %s", str(e))
+        return None
+    except ValueError as e:
+        logging.error("Invalid JSON in %s: %s", json_file_path, str(e))
+        return None
+
+def render_query(template, start_date, end_date):
+    return template.replace("{{start_date}}", start_date).replace("{{end_date}}", end_date)
+
+def report_templates(data):
+    # Every JQL template the report fetches, keyed by (category, template name)
+    templates = {}
+    for sub_query in REPORT_SUB_QUERIES:
+        for category in CATEGORIES:
+            templates[(category, sub_query)] = data[category][sub_query]
+    for defect_query in DEFECT_QUERIES:
+        templates[('Regression', defect_query)] = data["Regression"][defect_query]
+    return templates
+
+def jql_problems(template):
+    # Cheap syntax checks that catch broken edits before a report sends them to Jira
+    if not isinstance(template, str) or not template.strip():
+        return ["template is empty"]
+
+    problems = [f"unknown placeholder '{{{{{name}}}}}'" for name in PLACEHOLDER_PATTERN.findall(template)
+                if name not in TEMPLATE_PLACEHOLDERS]
+    # JQL strings are "..." or '...', and a backslash escapes the next character, e.g. 'fix \'(crash'
+    depth = 0
+    quote = None
+    escaped = False
+    for character in template:
+        if escaped:
+            escaped = False
+        elif character == '\\':
+            escaped = True
+        elif quote is not None:
+            if character == quote:
+                quote = None
+        elif character in ('"', "'"):
+            quote = character
+        elif character == '(':
+            depth += 1
+        elif character == ')':
+            depth -= 1
+            if depth < 0:
+                break
+    if quote is not None:
+        problems.append("unterminated quote")
+    elif depth != 0:
+        problems.append("unbalanced parentheses")
+    return problems
+
+def template_problems(data, common_sub_queries=COMMON_SUB_QUERIES):
+    # (errors, warnings): the required templates must be present and the ones a report reads well formed.
+    # Problems in templates no report reads are only warnings, so they never stop a report.
+    errors = []
+    warnings = []
+    for category in CATEGORIES:
+        templates = data.get(category)
+        if not isinstance(templates, dict):
+            errors.append(f"{category} JQL queries not found in JSON data.")
+            continue
+
+        required = list(common_sub_queries) + (DEFECT_QUERIES if category == "Regression" else [])
+        for sub_query in required:
+            if templates.get(sub_query) is None:
+                errors.append(f"{category} JQL query for '{sub_query}' not found in JSON data.")
+        read = set(REPORT_SUB_QUERIES) | (set(DEFECT_QUERIES) if category == "Regression" else set())
+        for sub_query, template in templates.items():
+            problems = [f"{category} JQL query '{sub_query}': {problem}" for problem in jql_problems(template)]
+            (errors if sub_query in read else warnings).extend(problems)
+    return errors, warnings
+
+def log_template_problems(data, json_file_path=None):
+    # Logs every problem and returns the errors, which stop a report
+    errors, warnings = template_problems(data)
+    prefix = f"{json_file_path}: " if json_file_path else ""
+    for warning in warnings:
+        logging.warning("%s%s (not used by the report)", prefix, warning)
+    for error in errors:
+        logging.error("%s%s", prefix, error)
+    return errors
+
+def load_api_credentials(json_file_path):
+    try:
+        with open(json_file_path, 'r') as json_file:
+            api_credentials = json.load(json_file)["api_credentials"]
+    except FileNotFoundError as e:
+        logging.error("JSON file not found: %s", str(e))
+        return None
     except KeyError:
         logging.error("API credentials not found in JSON data.")
+        return None
+
+    auth = (api_credentials["api_username"], api_credentials["api_password"])
+    return api_credentials["api_url"], auth
+
+def validate_query_files(query_files):
+    # The same template checks a report run makes, for every queries file, without contacting Jira
+    valid = True
+    for json_file_path in query_files:
+        data = read_queries(json_file_path)
+        if data is None:
+            valid = False
+            continue
+
+        errors, warnings = template_problems(data)
+        api_credentials = data.get("api_credentials") or {}
+        errors.extend(f"API credential '{name}' not found in JSON data." for name in ("api_url", "api_username", "api_password")
+                      if not api_credentials.get(name))
+        for warning in warnings:
+            logging.warning("%s: %s (not used by the report)", json_file_path, warning)
+        for error in errors:
+            logging.error("%s: %s", json_file_path, error)
+        print(f"{json_file_path}: " + (f"{len(errors)} problem(s)" if errors else "OK")
+              + (f", {len(warnings)} warning(s)" if warnings else ""))
+        valid = valid and not errors
+    return valid
+
+def print_rendered_queries(query_files, periods):
+    # Dry run: the JQL each report would send, one line per template
+    for json_file_path in query_files:
+        data = read_queries(json_file_path)
+        if data is None:
+            return False
+        if log_template_problems(data, json_file_path):
+            return False
+
+        for start_date, end_date in periods:
+            print(f"# {json_file_path}: {start_date} to {end_date}")
+            for (category, sub_query), template in report_templates(data).items():
+                print(f"{category}/{sub_query}: {render_query(template, start_date, end_date)}")
+    return True
+
+def parse_period(value):
+    # A period is "START:END" (or "START END") with both dates as YYYY-MM-DD
+    parts = value.replace(':', ' ').split()
+    if len(parts) != 2:
+        raise argparse.ArgumentTypeError(f"invalid period '{value}', expected START:END")
+    for part in parts:
+        try:
+            datetime.strptime(part, "%Y-%m-%d")
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid date '{part}' in period '{value}', expected YYYY-MM-DD")
+    return parts[0], parts[1]
+
+def read_periods_file(path):
+    with open(path, 'r') as periods_file:
+        return [parse_period(line) for line in periods_file if line.strip() and not line.startswith('#')]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the QMR/MBR Jira report.")
+    parser.add_argument('--queries', action='append', metavar='JSON',
+                        help="queries.json file to report on; repeat for several query sets")
+    parser.add_argument('--period', action='append', type=parse_period, metavar='START:END',
+                        help="report period as YYYY-MM-DD:YYYY-MM-DD; repeat for several periods")
+    parser.add_argument('--periods-file', metavar='PATH',
+                        help="file with one START:END period per line")
+    parser.add_argument('--trend', action='store_true',
+                        help="fetch each query once over all periods and slice the periods locally")
+    parser.add_argument('--output-dir', default='reports',
+                        help="directory for batch reports (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="reports generated at the same time in batch mode (default: %(default)s)")
+    parser.add_argument('--max-in-flight', type=int, default=8,
+                        help="concurrent Jira requests shared by all reports (default: %(default)s)")
+    parser.add_argument('--issue-cache', action='store_true',
+                        help="keep downloaded issue lists in .jira_cache.sqlite between runs; a cached query is held in "
+                             "memory whole instead of being streamed page by page")
+    parser.add_argument('--cache-ttl', type=int, default=3600,
+                        help="with --issue-cache, seconds before cached issue lists are refreshed (default: %(default)s)")
+    parser.add_argument('--format', action='append', choices=sorted(EXPORTERS), dest='formats',
+                        help="output format for the report tables; repeat for several (default: xlsx)")
+    parser.add_argument('--export-issues', action='store_true',
+                        help="also export one row per fetched issue (downloads issues instead of counts)")
+    parser.add_argument('--pagination', choices=['offset', 'keyset'], default='offset',
+                        help="page issue queries by startAt offset or by issue id (keyset); keyset stays fast and consistent "
+                             "on very large or changing result sets (default: %(default)s)")
+    parser.add_argument('--multi-team', action='store_true',
+                        help="with several --queries files: fetch queries the teams share (or that another team's query "
+                             "covers) once, and build each team's report in its own process; not with --trend, "
+                             "--snapshot-store or --serve")
+    parser.add_argument('--snapshot-store', metavar='PATH',
+                        help="SQLite file of issue snapshots; reruns of a period only fetch issues changed since the last run "
+                             "(not with --trend)")
+    parser.add_argument('--validate', action='store_true',
+                        help="check every template in the queries files and exit, without contacting Jira")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="print the JQL each report would send and exit, without contacting Jira")
+    parser.add_argument('--serve', action='store_true',
+                        help="run as a local HTTP service answering GET /report?start=...&end=...&format=json|xlsx")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="address the service listens on (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=8765,
+                        help="port the service listens on (default: %(default)s)")
+    parser.add_argument('--result-ttl', type=int, default=60,
+                        help="seconds the service reuses a finished report for the same period (default: %(default)s)")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="write a cProfile dump of the run (main thread) to PATH")
+    return parser.parse_args(argv)
+
+def overlap_ranges(periods):
+    # Each period mapped to the (start, end) range of all periods it overlaps, directly or through others,
+    # or to None when it overlaps none
+    ranges = {}
+    group = []
+    for period in sorted(set(periods)) + [None]:
+        if group and (period is None or period[0] > max(end_date for _, end_date in group)):
+            group_range = (group[0][0], max(end_date for _, end_date in group)) if len(group) > 1 else None
+            ranges.update((member, group_range) for member in group)
+            group = []
+        if period is not None:
+            group.append(period)
+    return ranges
+
+def run_batch(query_files, periods, output_dir, workers, max_in_flight, cache_ttl, trend=False, exporters=None, export_issues=False,
+              snapshots=None, pagination='offset'):
+    from jira_client import JiraClient
+
+    # Reports share one HTTP client and one memo per Jira instance and account, plus the on-disk cache (if any),
+    # so overlapping runs reuse connections, request slots and already fetched results. The memo is keyed by
+    # JQL only, so queries files with other api_credentials must not share it.
+    os.makedirs(output_dir, exist_ok=True)
+    clients = {}
+    memos = {}
+    cache = ResponseCache(os.path.join(output_dir, ".jira_cache.sqlite"), ttl_seconds=cache_ttl) if cache_ttl is not None else None
+    # Overlapping periods (e.g. 13 weeks next to 3 months) fetch their issue queries once over the range they span
+    fetch_ranges = overlap_ranges(periods)
+
+    runs = []
+    for json_file_path in query_files:
+        credentials = load_api_credentials(json_file_path)
+        if credentials is None:
+            return False
+        api_url, auth = credentials
+        if credentials not in clients:
+            clients[credentials] = JiraClient(api_url, auth, pool_size=max_in_flight, max_in_flight=max_in_flight)
+            memos[credentials] = QueryMemo()
+        memo = memos[credentials]
+        # Read once for all of the file's runs; a file that can't be read or validated fails in its runs instead
+        data = read_queries(json_file_path)
+        plannable = data is not None and not template_problems(data)[0]
+
+        if trend:
+            # One run per queries file covering every period
+            generator = JiraReportGenerator(api_url, auth, json_file_path, cache=cache, client=clients[credentials], memo=memo,
+                                            exporters=exporters, export_issues=export_issues, pagination=pagination, queries=data)
+            if plannable:
+                memo.expect(generator.trend_fetches(data, periods).values())
+            runs.append((generator, None, None, None))
+            continue
+
+        for start_date, end_date in periods:
+            generator = JiraReportGenerator(api_url, auth, json_file_path, cache=cache, client=clients[credentials], memo=memo,
+                                            exporters=exporters, export_issues=export_issues, snapshots=snapshots,
+                                            pagination=pagination, queries=data)
+            fetch_range = fetch_ranges[(start_date, end_date)]
+            if plannable and snapshots is None:
+                memo.expect((fetch, jql_query, kwargs) for fetch, jql_query, kwargs, _
+                            in generator.planned_fetches(data, start_date, end_date, fetch_range).values())
+            runs.append((generator, start_date, end_date, fetch_range))
+
+    failed_runs = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            futures = []
+            for generator, start_date, end_date, fetch_range in runs:
+                if trend:
+                    future = executor.submit(generator.generate_trend_report, periods, output_dir)
+                else:
+                    future = executor.submit(generator.generate_report, start_date, end_date, output_dir, fetch_range)
+                futures.append((future, generator, start_date, end_date))
+            for future, generator, start_date, end_date in futures:
+                try:
+                    if future.result() is None:
+                        # Missing queries file, failed validation or templates trend mode can't slice; already logged
+                        logging.error("Report for %s (%s to %s) not generated.", generator.json_file_path, start_date, end_date)
+                        failed_runs += 1
+                except requests.exceptions.RequestException:
+                    logging.error("Report for %s (%s to %s) not generated: Jira requests failed after retries.",
+                                  generator.json_file_path, start_date, end_date)
+                    failed_runs += 1
+    finally:
+        for client in clients.values():
+            client.close()
+
+    print(f"Batch: {len(runs) - failed_runs}/{len(runs)} reports generated, "
+          f"query memo {sum(memo.hits for memo in memos.values())} hits, {sum(memo.misses for memo in memos.values())} misses")
+    return failed_runs == 0
+
+def build_team_report(json_file_path, data, counts, frames, start_date, end_date, output_dir, exporters=None, export_issues=False):
+    # Runs in a worker process of run_multi_team; never contacts Jira
+    generator = JiraReportGenerator(None, None, json_file_path, queries=data, exporters=exporters, export_issues=export_issues)
+    try:
+        return generator.report_from_counts(data, counts, frames, start_date, end_date, output_dir)
+    finally:
+        generator.client.close()
+
+def run_multi_team(query_files, periods, output_dir, workers, max_in_flight, cache_ttl, exporters=None, export_issues=False,
+                   pagination='offset'):
+    from jira_client import JiraClient
+    from jql_dedup import apply_filters, plan_fetches
+
+    # Teams on the same Jira instance are planned together (see jql_dedup.plan_fetches): queries that are
+    # identical once normalized are counted, or downloaded where their issues are needed, once; queries narrower
+    # than a downloaded one by labels/status/resolution clauses only are filtered from its issues locally.
+    # Each team's aggregation and export then runs in its own process.
+    os.makedirs(output_dir, exist_ok=True)
+    cache = ResponseCache(os.path.join(output_dir, ".jira_cache.sqlite"), ttl_seconds=cache_ttl) if cache_ttl is not None else None
+
+    instances = {}
+    for json_file_path in query_files:
+        credentials = load_api_credentials(json_file_path)
+        data = read_queries(json_file_path)
+        if credentials is None or data is None:
+            return False
+        if log_template_problems(data, json_file_path):
+            return False
+        instances.setdefault(credentials, []).append((json_file_path, data))
+
+    failed_runs = 0
+    futures = []
+    with ProcessPoolExecutor(max_workers=max(workers, 1)) as executor:
+        for index, ((api_url, auth), teams) in enumerate(instances.items()):
+            client = JiraClient(api_url, auth, pool_size=max_in_flight, max_in_flight=max_in_flight)
+            fetcher = JiraReportGenerator(api_url, auth, teams[0][0], cache=cache, client=client, pagination=pagination)
+            try:
+                for start_date, end_date in periods:
+                    queries = {(json_file_path, name): render_query(template, start_date, end_date)
+                               for json_file_path, data in teams for name, template in report_templates(data).items()}
+                    issue_fetches, count_fetches, plan = plan_fetches(
+                        queries, lambda name: export_issues or name[1][1] in DEFECT_QUERIES)
+                    jobs = {clauses: partial(fetcher.memoized_fetch, fetcher.fetch_issue_frame, jql_query, fields=FILTER_FIELDS,
+                                             filter_columns=True)
+                            for clauses, jql_query in issue_fetches.items()}
+                    for clauses, jql_query in count_fetches.items():
+                        for priority in PRIORITY_CLAUSES:
+                            jobs[(clauses, priority)] = partial(fetcher.memoized_fetch, fetcher.fetch_issue_count,
+                                                                fetcher.priority_query(jql_query, priority))
+                    try:
+                        with fetcher.instrumentation.phase('fetch'):
+                            results = fetcher.run_queries(jobs)
+                    except requests.exceptions.RequestException:
+                        logging.error("Reports for %s to %s not generated: Jira requests failed after retries.", start_date, end_date)
+                        failed_runs += len(teams)
+                        continue
+                    print(f"Multi-team {start_date} to {end_date}: {len(queries)} queries from {len(teams)} queries files "
+                          f"served by {len(issue_fetches)} issue downloads and {len(count_fetches)} counts")
+
+                    # Per-team filtering happens here so workers are sent only the counts and issues each team reports on
+                    with fetcher.instrumentation.phase('local_filter'):
+                        for json_file_path, data in teams:
+                            count_rows = []
+                            frames = {}
+                            for (category, sub_query) in report_templates(data):
+                                kind, clauses, filters = plan[(json_file_path, (category, sub_query))]
+                                if kind == 'count':
+                                    count_rows.extend((category, sub_query, priority, results[(clauses, priority)])
+                                                      for priority in PRIORITIES)
+                                    continue
+                                frame = apply_filters(results[clauses], filters).drop(columns=FILTER_COLUMNS)
+                                if sub_query in REPORT_SUB_QUERIES:
+                                    count_rows.extend((category, sub_query, priority, count)
+                                                      for priority, count in frame['priority'].value_counts().items())
+                                if export_issues or sub_query in DEFECT_QUERIES:
+                                    frames[(category, sub_query)] = frame
+                            counts = pd.DataFrame(count_rows, columns=['category', 'sub_query', 'priority', 'count'])
+                            future = executor.submit(build_team_report, json_file_path, data, counts, frames, start_date,
+                                                     end_date, output_dir, exporters, export_issues)
+                            futures.append((future, json_file_path, start_date, end_date))
+            finally:
+                client.close()
+            json_path, _ = fetcher.instrumentation.write(os.path.join(output_dir, f"multi_team_{index}_fetch_timings"), fetcher.query_memo)
+            print(f"Fetch timings saved to {json_path}")
+
+        for future, json_file_path, start_date, end_date in futures:
+            try:
+                future.result()
+            except Exception as e:
+                # A failed aggregation or export costs that team's report only
+                logging.error("Report for %s (%s to %s) not generated: %s", json_file_path, start_date, end_date, str(e))
+                failed_runs += 1
+
+    total_runs = len(query_files) * len(periods)
+    print(f"Multi-team: {total_runs - failed_runs}/{total_runs} reports generated")
+    return failed_runs == 0
+
+def run_service(json_file_path, output_dir, host, port, max_in_flight, cache_ttl, result_ttl, snapshots=None, pagination='offset'):
+    from jira_client import JiraClient
+    from report_service import ReportService
+
+    credentials = load_api_credentials(json_file_path)
+    if credentials is None:
+        return False
+    api_url, auth = credentials
+
+    # One client (and the issue cache, with --issue-cache) for the life of the service; every request gets its own generator
+    os.makedirs(output_dir, exist_ok=True)
+    client = JiraClient(api_url, auth, pool_size=max_in_flight, max_in_flight=max_in_flight)
+    cache = ResponseCache(os.path.join(output_dir, ".jira_cache.sqlite"), ttl_seconds=cache_ttl) if cache_ttl is not None else None
+    make_generator = partial(JiraReportGenerator, api_url, auth, json_file_path, max_in_flight=max_in_flight, cache=cache,
+                             client=client, snapshots=snapshots, pagination=pagination)
+    try:
+        ReportService(json_file_path, output_dir, make_generator, result_ttl).serve(host, port)
+    finally:
+        client.close()
+    return True
+
+def main(argv=None):
+    logging.basicConfig(level=logging.WARNING)  # Configure logging
+    args = parse_args(argv)
+
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(run, args)
+        finally:
+            profiler.dump_stats(args.profile)
+            print(f"Profile saved to {args.profile}")
+    else:
+        run(args)
+
+def run(args):
+    periods = list(args.period or [])
+    if args.periods_file:
+        periods.extend(read_periods_file(args.periods_file))
+
+    # Fast paths: neither needs pandas, requests or a Jira connection
+    if args.validate or args.dry_run:
+        query_files = args.queries or [adjust_path_for_os("json path")]
+        if args.validate and not validate_query_files(query_files):
+            raise SystemExit(1)
+        if args.dry_run:
+            if not periods:
+                periods = [(input("Enter start date (YYYY-MM-DD): "), input("Enter end date (YYYY-MM-DD): "))]
+            if not print_rendered_queries(query_files, periods):
+                raise SystemExit(1)
+        return
+
+    if args.multi_team:
+        # Multi-team runs fetch outside the report generators, so these would otherwise be ignored silently
+        incompatible = [option for option, value in (('--trend', args.trend), ('--snapshot-store', args.snapshot_store),
+                                                     ('--serve', args.serve)) if value]
+        if incompatible:
+            logging.error("--multi-team cannot be combined with %s.", ', '.join(incompatible))
+            raise SystemExit(1)
+        if not periods:
+            logging.error("--multi-team needs the periods on the command line (--period or --periods-file).")
+            raise SystemExit(1)
+    if args.trend and args.snapshot_store:
+        # Snapshots are kept per period; a trend report fetches the union of its periods instead
+        logging.error("--trend cannot be combined with --snapshot-store.")
+        raise SystemExit(1)
+
+    try:
+        exporters = make_exporters(args.formats or ['xlsx'])
+    except ImportError as e:
+        logging.error("Output format not available (%s); install pyarrow for parquet output.", str(e))
+        raise SystemExit(1)
+    snapshots = SnapshotStore(args.snapshot_store) if args.snapshot_store else None
+    # No cache unless asked for: only uncached issue queries stream into the report with bounded memory
+    cache_ttl = args.cache_ttl if args.issue_cache else None
+
+    if args.serve:
+        json_file_path = adjust_path_for_os(args.queries[0]) if args.queries else adjust_path_for_os("json path")
+        if not run_service(json_file_path, args.output_dir, args.host, args.port, args.max_in_flight, cache_ttl,
+                           args.result_ttl, snapshots, args.pagination):
+            raise SystemExit(1)
+        return
+
+    if periods:
+        # Non-interactive batch mode: every queries file for every period
+        query_files = args.queries or [adjust_path_for_os("json path")]
+        if args.multi_team:
+            if not run_multi_team(query_files, periods, args.output_dir, args.workers, args.max_in_flight, cache_ttl,
+                                  exporters, args.export_issues, args.pagination):
+                raise SystemExit(1)
+            return
+        if not run_batch(query_files, periods, args.output_dir, args.workers, args.max_in_flight, cache_ttl, args.trend,
+                         exporters, args.export_issues, snapshots, args.pagination):
+            raise SystemExit(1)
         return
 
-    api_username = api_credentials["api_username"]
-    api_password = api_credentials["api_password"]
-    api_url = api_credentials["api_url"]
+    json_file_path = adjust_path_for_os(args.queries[0]) if args.queries else adjust_path_for_os("json path")
 
-    auth = (api_username, api_password)
+    credentials = load_api_credentials(json_file_path)
+    if credentials is None:
+        return
+    api_url, auth = credentials
 
     # Print the Username and Adjusted Path from the path_handler module
     print(f"Username: {os.getlogin()}")
     print(f"Adjusted Path: {json_file_path}")
 
 
-    jira_report_generator = JiraReportGenerator(api_url, auth, json_file_path)
+    # Keep the issue cache next to the queries file so reruns can reuse earlier downloads
+    cache = None
+    if cache_ttl is not None:
+        cache = ResponseCache(os.path.join(os.path.dirname(os.path.abspath(json_file_path)), ".jira_cache.sqlite"), ttl_seconds=cache_ttl)
+    jira_report_generator = JiraReportGenerator(api_url, auth, json_file_path, max_in_flight=args.max_in_flight, cache=cache,
+                                                exporters=exporters, export_issues=args.export_issues, snapshots=snapshots,
+                                                pagination=args.pagination)
     start_date = input("Enter start date (YYYY-MM-DD): ")
     end_date = input("Enter end date (YYYY-MM-DD): ")
 
-    jira_report_generator.generate_report(start_date, end_date)
+    try:
+        jira_report_generator.generate_report(start_date, end_date)
+    except requests.exceptions.RequestException:
+        # Already logged with the failing query; don't write a report full of silent zeros
+        logging.error("Report not generated: Jira requests failed after retries.")
+        raise SystemExit(1)
+    finally:
+        jira_report_generator.client.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,159 @@
+import bisect
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Local stand-in for Jira's /rest/api/latest/search with deterministic synthetic issues.
+# Every JQL matches the same synthetic issue set; the priority clauses added by the count-only
+# path and the id clauses and ordering added by keyset pagination are honoured.
+
+SEARCH_PATH = "/rest/api/latest/search"
+PRIORITY_NAMES = ['Blocker', 'Critical', 'Major', 'Minor', 'Trivial']
+PRIORITY_WEIGHTS = [5, 10, 45, 30, 10]
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.000+0000"
+
+PRIORITY_EQUALS = re.compile(r'\bpriority\s*=\s*(\w+)', re.IGNORECASE)
+PRIORITY_NOT_IN = re.compile(r'\bpriority\s+not\s+in\s*\(([^)]*)\)', re.IGNORECASE)
+ID_AFTER = re.compile(r'\bid\s*>\s*(\d+)', re.IGNORECASE)
+ID_UP_TO = re.compile(r'\bid\s*<=\s*(\d+)', re.IGNORECASE)
+ORDER_BY_ID_DESC = re.compile(r'ORDER\s+BY\s+id\s+DESC', re.IGNORECASE)
+# Issue ids are ID_OFFSET + index, so index order is id order
+ID_OFFSET = 100000
+
+
+class SyntheticIssues:
+
+    def __init__(self, total_issues, seed=0, start=datetime(2023, 1, 1)):
+        self.total_issues = total_issues
+        self.start = start
+        generator = random.Random(seed)
+        # One small int per issue; the issue bodies themselves are generated on demand per page
+        self.priority_codes = generator.choices(range(len(PRIORITY_NAMES)), weights=PRIORITY_WEIGHTS, k=total_issues)
+        self.matches = {}
+        self.lock = threading.Lock()
+
+    def matching(self, jql_query):
+        # Indices of the issues a query matches, cached per priority filter
+        excluded = PRIORITY_NOT_IN.search(jql_query)
+        included = PRIORITY_EQUALS.search(jql_query)
+        if excluded:
+            names = {name.strip() for name in excluded.group(1).split(',')}
+            codes = frozenset(code for code, name in enumerate(PRIORITY_NAMES) if name not in names)
+        elif included:
+            codes = frozenset(code for code, name in enumerate(PRIORITY_NAMES) if name == included.group(1))
+        else:
+            return range(self.total_issues)
+
+        with self.lock:
+            if codes not in self.matches:
+                self.matches[codes] = [index for index, code in enumerate(self.priority_codes) if code in codes]
+            return self.matches[codes]
+
+    def issue(self, index, fields):
+        created = self.start + timedelta(minutes=index * 7 % 525600)
+        resolved = created + timedelta(days=index % 60, hours=index % 24) if index % 3 else None
+        updated = resolved or created + timedelta(days=1)
+        all_fields = {
+            'priority': {'name': PRIORITY_NAMES[self.priority_codes[index]], 'id': str(self.priority_codes[index] + 1)},
+            'created': created.strftime(TIMESTAMP_FORMAT),
+            'updated': updated.strftime(TIMESTAMP_FORMAT),
+            'resolutiondate': resolved.strftime(TIMESTAMP_FORMAT) if resolved else None,
+            'status': {'name': 'Resolved' if resolved else 'Open'},
+            'summary': f"Synthetic issue {index}",
+            'labels': ['vega-ta', 'vega-ta-stability']
+        }
+        if fields:
+            all_fields = {name: value for name, value in all_fields.items() if name in fields}
+        return {'id': str(ID_OFFSET + index), 'key': f"FAKE-{index}", 'fields': all_fields}
+
+
+class FakeJira:
+
+    def __init__(self, total_issues, latency=0.0, throttle_every=0, retry_after=0, max_page_size=100, seed=0, offset_latency=0.0):
+        self.issues = SyntheticIssues(total_issues, seed)
+        # Seconds added to every response, to model network and server time
+        self.latency = latency
+        # Seconds added per 1000 issues skipped by startAt, to model deep offsets getting slower on Jira Server
+        self.offset_latency = offset_latency
+        # Answer every Nth request with 429 Too Many Requests and a Retry-After header
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.max_page_size = max_page_size
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.throttled_count = 0
+        self.issues_served = 0
+        self.server = None
+
+    def handle_search(self, params):
+        with self.lock:
+            self.request_count += 1
+            throttled = self.throttle_every and self.request_count % self.throttle_every == 0
+            if throttled:
+                self.throttled_count += 1
+        jql_query = params.get('jql', [''])[0]
+        start_at = int(params.get('startAt', ['0'])[0])
+        if self.latency or self.offset_latency:
+            time.sleep(self.latency + self.offset_latency * start_at / 1000)
+        if throttled:
+            return 429, None
+
+        max_results = min(int(params.get('maxResults', ['50'])[0]), self.max_page_size)
+        fields = set(params['fields'][0].split(',')) if 'fields' in params else None
+
+        matching = self.issues.matching(jql_query)
+        after_id = ID_AFTER.search(jql_query)
+        if after_id:
+            matching = matching[bisect.bisect_right(matching, int(after_id.group(1)) - ID_OFFSET):]
+        up_to_id = ID_UP_TO.search(jql_query)
+        if up_to_id:
+            matching = matching[:bisect.bisect_right(matching, int(up_to_id.group(1)) - ID_OFFSET)]
+        if ORDER_BY_ID_DESC.search(jql_query):
+            matching = matching[::-1]
+        page = [self.issues.issue(index, fields) for index in matching[start_at:start_at + max_results]]
+        with self.lock:
+            self.issues_served += len(page)
+        return 200, {'startAt': start_at, 'maxResults': max_results, 'total': len(matching), 'issues': page}
+
+    def start(self):
+        fake_jira = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != SEARCH_PATH:
+                    self.send_error(404)
+                    return
+
+                status, body = fake_jira.handle_search(parse_qs(url.query))
+                payload = json.dumps(body).encode('utf-8') if body is not None else b''
+                self.send_response(status)
+                if status == 429:
+                    self.send_header('Retry-After', str(fake_jira.retry_after))
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def api_url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}{SEARCH_PATH}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
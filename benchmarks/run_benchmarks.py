@@ -0,0 +1,188 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from fake_jira import FakeJira  # noqa: E402
+
+# End-to-end benchmark of generate_report against a local fake Jira. Every case runs in its own
+# process so peak RSS belongs to that case alone. CLI start-up time is measured for the paths that
+# never reach Jira. Results are compared against baseline.json.
+
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_SIZES = [1000, 10000]
+MODES = {
+    'count': {'count_only': True},
+    'issues': {'count_only': False},
+    'keyset': {'count_only': False, 'pagination': 'keyset'}
+}
+START_DATE, END_DATE = "2023-01-01", "2023-12-31"
+SCRIPT_PATH = os.path.join(REPO_DIR, "QMR_MBR.py")
+# Argument lists for the start-up cases; 'report-imports' is the cost every report pays before its first request
+STARTUP_CASES = {
+    'help': [SCRIPT_PATH, '--help'],
+    'validate': [SCRIPT_PATH, '--validate', '--queries', '{queries}'],
+    'dry-run': [SCRIPT_PATH, '--dry-run', '--queries', '{queries}', '--period', f"{START_DATE}:{END_DATE}"],
+    'report-imports': ['-c', "import QMR_MBR, jira_client; QMR_MBR.pd.DataFrame"]
+}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def write_queries_file(directory, api_url):
+    # The repo's query templates, pointed at the fake server instead of the real Jira
+    with open(os.path.join(REPO_DIR, "queries.json")) as json_file:
+        data = json.load(json_file)
+    data['api_credentials'] = {'api_username': 'benchmark', 'api_password': 'benchmark', 'api_url': api_url}
+
+    json_file_path = os.path.join(directory, "benchmark_queries.json")
+    with open(json_file_path, 'w') as json_file:
+        json.dump(data, json_file)
+    return json_file_path
+
+
+def run_case(size, mode, latency, throttle_every, offset_latency):
+    from QMR_MBR import JiraReportGenerator
+
+    fake_jira = FakeJira(size, latency=latency, throttle_every=throttle_every, offset_latency=offset_latency).start()
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            json_file_path = write_queries_file(output_dir, fake_jira.api_url)
+            generator = JiraReportGenerator(fake_jira.api_url, ('benchmark', 'benchmark'), json_file_path, **MODES[mode])
+
+            started = time.perf_counter()
+            # The report printout is not part of what we measure
+            with contextlib.redirect_stdout(io.StringIO()):
+                generator.generate_report(START_DATE, END_DATE, output_dir)
+            wall_seconds = time.perf_counter() - started
+            generator.client.close()
+    finally:
+        fake_jira.stop()
+
+    return {
+        'size': size,
+        'mode': mode,
+        'wall_seconds': round(wall_seconds, 3),
+        'requests': fake_jira.request_count,
+        'throttled': fake_jira.throttled_count,
+        'issues_served': fake_jira.issues_served,
+        'issues_per_second': round(fake_jira.issues_served / wall_seconds, 1),
+        'requests_per_second': round(fake_jira.request_count / wall_seconds, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1)
+    }
+
+
+def run_case_subprocess(size, mode, latency, throttle_every, offset_latency):
+    command = [sys.executable, os.path.abspath(__file__), '--case', str(size), mode, '--latency', str(latency),
+               '--throttle-every', str(throttle_every), '--offset-latency', str(offset_latency)]
+    completed = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure_startup(repeats):
+    # Median wall time of a fresh interpreter per case
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        json_file_path = write_queries_file(directory, "http://127.0.0.1:9/rest/api/latest/search")
+        for name, arguments in STARTUP_CASES.items():
+            command = [sys.executable] + [argument.format(queries=json_file_path) for argument in arguments]
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                subprocess.run(command, cwd=REPO_DIR, stdout=subprocess.DEVNULL, check=True)
+                timings.append(time.perf_counter() - started)
+            results[f"startup-{name}"] = {'mode': 'startup', 'wall_seconds': round(statistics.median(timings), 3), 'requests': 0}
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # A case regresses when it sends more requests, or takes noticeably more time or memory, than its baseline
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result['requests'] > expected['requests']:
+            regressions.append(f"{name}: requests {expected['requests']} -> {result['requests']}")
+        for metric in ('wall_seconds', 'peak_rss_mb'):
+            if metric in result and metric in expected and result[metric] > expected[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {expected[metric]} -> {result[metric]}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark generate_report against a local fake Jira.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Synthetic issue counts, e.g. 1000 10000 100000 1000000 (default: 1000 10000)")
+    parser.add_argument('--modes', nargs='+', choices=sorted(MODES), default=sorted(MODES))
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every fake Jira response")
+    parser.add_argument('--throttle-every', type=int, default=0, help="Answer every Nth request with 429")
+    parser.add_argument('--offset-latency', type=float, default=0.0,
+                        help="Seconds added per 1000 issues skipped by startAt, as deep offsets get slower on Jira Server")
+    parser.add_argument('--startup-repeats', type=int, default=5,
+                        help="Runs per CLI start-up case, 0 to skip them (default: 5)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="Allowed relative increase in wall time and peak RSS before a case is a regression")
+    parser.add_argument('--case', nargs=2, metavar=('SIZE', 'MODE'), help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.case:
+        size, mode = args.case
+        print(json.dumps(run_case(int(size), mode, args.latency, args.throttle_every, args.offset_latency)))
+        return
+
+    results = {}
+    if args.startup_repeats > 0:
+        for name, result in measure_startup(args.startup_repeats).items():
+            results[name] = result
+            print(f"{name:>22}: {result['wall_seconds']:8.3f}s")
+
+    for size in args.sizes:
+        for mode in args.modes:
+            result = run_case_subprocess(size, mode, args.latency, args.throttle_every, args.offset_latency)
+            results[f"{mode}-{size}"] = result
+            print(f"{mode:>6} {size:>8} issues: {result['wall_seconds']:8.3f}s  {result['requests']:6} requests  "
+                  f"{result['issues_per_second']:10.1f} issues/s  {result['peak_rss_mb']:7.1f} MB peak RSS")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
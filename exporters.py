@@ -0,0 +1,77 @@
+# Output formats for the report tables. Each exporter writes one table to <path_prefix>.<extension>
+# and returns the path it wrote; values stay typed (numbers, dates) in every format.
+
+
+class ExcelExporter:
+
+    extension = 'xlsx'
+
+    def write(self, frame, path_prefix, index=True):
+        # Imported here so the CLI can list formats without loading openpyxl
+        from openpyxl import Workbook
+
+        # openpyxl's write-only mode streams rows to the file instead of building every cell object
+        # in memory first, which is what makes to_excel slow on large issue tables
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        for row in self.rows(frame, index):
+            sheet.append(row)
+
+        path = f"{path_prefix}.{self.extension}"
+        workbook.save(path)
+        return path
+
+    def rows(self, frame, index):
+        index_width = frame.index.nlevels if index else 0
+
+        # One header row per column level, with the level name above the index column(s)
+        for level in range(frame.columns.nlevels):
+            header = [frame.columns.names[level]] + [None] * (index_width - 1) if index_width else []
+            yield header + list(frame.columns.get_level_values(level))
+
+        # Excel has no timezones: write UTC timestamps as naive datetimes, and empty cells for NaN/NaT
+        frame = frame.apply(lambda column: column.dt.tz_convert(None) if getattr(column.dtype, 'tz', None) else column)
+        values = frame.astype(object).where(frame.notna(), None)
+        index_values = [label if isinstance(label, tuple) else (label,) for label in frame.index] if index_width else None
+        for position, row in enumerate(values.itertuples(index=False, name=None)):
+            yield (list(index_values[position]) if index_width else []) + list(row)
+
+
+class CsvExporter:
+
+    extension = 'csv'
+
+    def write(self, frame, path_prefix, index=True):
+        path = f"{path_prefix}.{self.extension}"
+        frame.to_csv(path, index=index)
+        return path
+
+
+class ParquetExporter:
+
+    extension = 'parquet'
+
+    def __init__(self):
+        # pyarrow is optional and only needed for this format; fail before any report is fetched
+        import pyarrow  # noqa: F401
+
+    def write(self, frame, path_prefix, index=True):
+        # Parquet wants flat string column names, e.g. ('Regression', 'Blocker') -> 'Regression_Blocker'
+        if frame.columns.nlevels > 1:
+            frame = frame.set_axis(['_'.join(str(part) for part in column if part) for column in frame.columns], axis=1)
+
+        path = f"{path_prefix}.{self.extension}"
+        frame.to_parquet(path, index=index)
+        return path
+
+
+EXPORTERS = {
+    'xlsx': ExcelExporter,
+    'csv': CsvExporter,
+    'parquet': ParquetExporter
+}
+
+
+def make_exporters(formats):
+    # Raises ImportError when a format's optional dependency is missing
+    return [EXPORTERS[name]() for name in dict.fromkeys(formats)]
@@ -0,0 +1,79 @@
+import csv
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Per-run timing data: one entry per JQL sent to Jira plus wall time per report phase.
+# Written as <report>_timings.json / .csv next to the report.
+
+QUERY_FIELDS = ['jql', 'requests', 'pages', 'bytes', 'retries', 'cache_hits', 'latency_seconds', 'max_latency_seconds']
+
+
+class Instrumentation:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = {}
+        self.phases = []
+
+    def query_stats(self, jql_query):
+        # Caller holds the lock
+        stats = self.queries.get(jql_query)
+        if stats is None:
+            stats = {field: 0 for field in QUERY_FIELDS}
+            stats['jql'] = jql_query
+            self.queries[jql_query] = stats
+        return stats
+
+    def record_request(self, jql_query, seconds, bytes_received, retries, is_page):
+        with self.lock:
+            stats = self.query_stats(jql_query)
+            stats['requests'] += 1
+            stats['pages'] += 1 if is_page else 0
+            stats['bytes'] += bytes_received
+            stats['retries'] += retries
+            stats['latency_seconds'] += seconds
+            stats['max_latency_seconds'] = max(stats['max_latency_seconds'], seconds)
+
+    def record_cache_hit(self, jql_query):
+        with self.lock:
+            self.query_stats(jql_query)['cache_hits'] += 1
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.phases.append({'phase': name, 'seconds': time.perf_counter() - started})
+
+    def slowest_queries(self, count=3):
+        with self.lock:
+            return sorted(self.queries.values(), key=lambda stats: stats['latency_seconds'], reverse=True)[:count]
+
+    def write(self, path_prefix, memo=None):
+        with self.lock:
+            queries = [dict(stats) for stats in self.queries.values()]
+            phases = [dict(phase) for phase in self.phases]
+
+        summary = {'queries': queries, 'phases': phases}
+        if memo is not None:
+            summary['memo'] = {'hits': memo.hits, 'misses': memo.misses}
+
+        json_path = f"{path_prefix}.json"
+        with open(json_path, 'w') as json_file:
+            json.dump(summary, json_file, indent=2)
+
+        # Flat CSV with one row per query and per phase, for spreadsheets
+        csv_path = f"{path_prefix}.csv"
+        with open(csv_path, 'w', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=['type', 'name'] + QUERY_FIELDS[1:] + ['seconds'])
+            writer.writeheader()
+            for stats in queries:
+                writer.writerow(dict({key: value for key, value in stats.items() if key != 'jql'}, type='query', name=stats['jql']))
+            for phase in phases:
+                writer.writerow({'type': 'phase', 'name': phase['phase'], 'seconds': phase['seconds']})
+
+        return json_path, csv_path
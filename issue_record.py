@@ -0,0 +1,73 @@
+from datetime import datetime
+from sys import intern
+
+# Compact form of a Jira search result issue. Only the fields the report reads are kept, as slots instead of
+# nested dicts, and the names repeated across issues (priority, status, resolution, labels) are interned so
+# every issue shares one string object per name. Pages are decoded into records as soon as they arrive.
+
+JIRA_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+
+def intern_name(name):
+    return intern(name) if name else None
+
+
+def newest_updated(updated_values, previous=None):
+    # Newest 'updated' timestamp as a JQL date literal, in the timezone Jira rendered it in. previous, an
+    # earlier literal, is kept when it is newer or when there is no timestamp at all.
+    updated_dates = [datetime.strptime(updated, JIRA_TIMESTAMP_FORMAT) for updated in updated_values if updated]
+    if not updated_dates:
+        return previous
+    newest = max(updated_dates).strftime("%Y-%m-%d %H:%M")
+    return max(newest, previous) if previous else newest
+
+
+class IssueRecord:
+
+    __slots__ = ('id', 'key', 'priority', 'status', 'resolution', 'created', 'resolutiondate', 'labels', 'updated')
+
+    def __init__(self, id, key, priority=None, status=None, resolution=None, created=None, resolutiondate=None, labels=(),
+                 updated=None):
+        self.id = id
+        self.key = key
+        # Priority, status and resolution names, or None when the field is empty
+        self.priority = priority
+        self.status = status
+        self.resolution = resolution
+        # Jira timestamps are kept as strings; issues_frame parses a whole column at once
+        self.created = created
+        self.resolutiondate = resolutiondate
+        self.labels = labels
+        self.updated = updated
+
+    @classmethod
+    def from_json(cls, issue):
+        issue_fields = issue.get('fields') or {}
+        return cls(
+            int(issue['id']) if issue.get('id') else None,
+            issue.get('key'),
+            intern_name((issue_fields.get('priority') or {}).get('name')),
+            intern_name((issue_fields.get('status') or {}).get('name')),
+            intern_name((issue_fields.get('resolution') or {}).get('name')),
+            issue_fields.get('created'),
+            issue_fields.get('resolutiondate'),
+            tuple(intern(label) for label in issue_fields.get('labels') or ()),
+            issue_fields.get('updated')
+        )
+
+    @classmethod
+    def from_row(cls, row):
+        # Inverse of as_row, e.g. for rows read back from JSON
+        issue_id, key, priority, status, resolution, created, resolutiondate, labels, updated = row
+        return cls(issue_id, key, intern_name(priority), intern_name(status), intern_name(resolution), created, resolutiondate,
+                   tuple(intern(label) for label in labels), updated)
+
+    def as_row(self):
+        return (self.id, self.key, self.priority, self.status, self.resolution, self.created, self.resolutiondate,
+                list(self.labels), self.updated)
+
+
+def decode_page(page):
+    # Replace the raw issue dicts of a search result page with records; 'total' and the paging fields stay
+    page['issues'] = [IssueRecord.from_json(issue) for issue in page.get('issues', [])]
+    return page
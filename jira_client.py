@@ -0,0 +1,61 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    # orjson parses large search pages several times faster; it is optional
+    from orjson import loads as parse_json
+except ImportError:
+    from json import loads as parse_json
+
+# Statuses worth retrying: rate limiting and transient server/gateway errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class JiraClient:
+
+    def __init__(self, api_url, auth, pool_size=8, max_in_flight=8, max_retries=5, backoff_factor=1.0, timeout=60):
+        self.api_url = api_url
+        self.timeout = timeout
+        # Global cap on concurrent HTTP requests, shared by every query that uses this client
+        self.request_slots = threading.BoundedSemaphore(max_in_flight)
+
+        # Exponential backoff between attempts; a Retry-After header on 429/503 takes precedence
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        # Keep-alive pool so pages and queries reuse connections instead of a new TLS handshake each time
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.auth = auth
+        self.session.headers.update({'Accept': 'application/json', 'Accept-Encoding': 'gzip, deflate'})
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def search(self, params, instrumentation=None, query_name=None):
+        with self.request_slots:
+            started = time.perf_counter()
+            response = self.session.get(self.api_url, params=params, timeout=self.timeout)
+            elapsed = time.perf_counter() - started
+
+        if instrumentation is not None:
+            retries = getattr(response.raw, 'retries', None)
+            # query_name groups requests whose JQL differs per page (keyset pagination) under their base query
+            instrumentation.record_request(query_name or params.get('jql'), elapsed, len(response.content),
+                                           len(retries.history) if retries else 0, params.get('maxResults') != 0)
+
+        # Raises once retries are exhausted, so failures surface instead of turning into empty results
+        response.raise_for_status()
+        return parse_json(response.content)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,213 @@
+import re
+
+# JQL normalization for deduplicating queries across query files. A query made of top-level ANDs becomes a
+# set of canonical clauses, so queries that differ only in clause order, spacing, quoting or aliases compare
+# equal. Queries whose issues are needed are downloaded once per distinct query; a query whose clause set
+# contains a downloaded query's set, where every extra clause is on a field fetched with the issues (labels,
+# status, resolution), is served from those issues filtered locally. Everything else is counted once.
+
+ORDER_BY_PATTERN = re.compile(r'\s+ORDER\s+BY\s+.*$', re.IGNORECASE | re.DOTALL)
+CONNECTIVE_PATTERN = re.compile(r'\s+(AND|OR)\s+', re.IGNORECASE)
+CLAUSE_PATTERN = re.compile(r'^([\w.]+)\s*(not\s+in|in|is\s+not|is|!=|>=|<=|=|>|<|!~|~)\s*(.+)$', re.IGNORECASE | re.DOTALL)
+UNQUOTED_VALUE = re.compile(r'^[\w.-]+$')
+
+FIELD_ALIASES = {'type': 'issuetype'}
+# Fields requested with the issues, so clauses on them can be checked without asking Jira
+LOCAL_FIELDS = {'labels', 'status', 'resolution'}
+LOCAL_OPERATORS = {'=', '!=', 'in', 'not in', 'is', 'is not'}
+EMPTY_VALUES = {'empty', 'null'}
+
+
+def mask_nested(jql):
+    # Same length as jql, with quoted text and parenthesized groups blanked out, so any AND/OR left is top level
+    masked = []
+    depth = 0
+    in_quotes = False
+    for character in jql:
+        if character == '"':
+            in_quotes = not in_quotes
+        elif not in_quotes and character == '(':
+            depth += 1
+        elif not in_quotes and character == ')':
+            depth -= 1
+        else:
+            masked.append(character if depth == 0 and not in_quotes else '_')
+            continue
+        masked.append('_')
+    return ''.join(masked)
+
+
+def unwrap(text):
+    # Drop parentheses that enclose the whole text, e.g. '((a AND b))' -> 'a AND b'
+    text = text.strip()
+    while text.startswith('(') and text.endswith(')') and balanced(text[1:-1]):
+        text = text[1:-1].strip()
+    return text
+
+
+def balanced(text):
+    # False for '(a) AND (b)' stripped to 'a) AND (b': the outer parentheses didn't belong together
+    depth = 0
+    in_quotes = False
+    for character in text:
+        if character == '"':
+            in_quotes = not in_quotes
+        elif not in_quotes and character == '(':
+            depth += 1
+        elif not in_quotes and character == ')':
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0 and not in_quotes
+
+
+def split_top_level(jql):
+    # Top-level AND operands, or None when the query has a top-level OR and so isn't a plain conjunction
+    clauses = []
+    start = 0
+    for match in CONNECTIVE_PATTERN.finditer(mask_nested(jql)):
+        if match.group(1).upper() == 'OR':
+            return None
+        clauses.append(jql[start:match.start()])
+        start = match.end()
+    clauses.append(jql[start:])
+    return [clause.strip() for clause in clauses]
+
+
+def canonical_text(text):
+    return re.sub(r'\s+', ' ', text.strip()).lower()
+
+
+def canonical_value(value):
+    value = value.strip()
+    if len(value) >= 2 and value.startswith('"') and value.endswith('"'):
+        value = value[1:-1]
+    value = value.lower()
+    return value if UNQUOTED_VALUE.match(value) else f'"{value}"'
+
+
+def parse_values(value):
+    # A single value or a parenthesized list; None for anything more complex
+    value = value.strip()
+    if value.startswith('(') and value.endswith(')') and balanced(value[1:-1]):
+        inner = value[1:-1]
+        items, start = [], 0
+        masked = mask_nested(inner)
+        for position, character in enumerate(masked):
+            if character == ',':
+                items.append(inner[start:position])
+                start = position + 1
+        items.append(inner[start:])
+        return [canonical_value(item) for item in items if item.strip()]
+    if ' ' in mask_nested(value) or '(' in value:
+        return None
+    return [canonical_value(value)]
+
+
+def normalize_clause(clause):
+    match = CLAUSE_PATTERN.match(clause.strip())
+    values = parse_values(match.group(3)) if match else None
+    if not values:
+        return canonical_text(clause)
+
+    field = match.group(1).lower()
+    field = FIELD_ALIASES.get(field, field)
+    operator = ' '.join(match.group(2).lower().split())
+    # 'labels in (x)' is 'labels = x'
+    if operator in ('in', 'not in') and len(values) == 1:
+        operator = '=' if operator == 'in' else '!='
+    if operator in ('in', 'not in'):
+        return f"{field} {operator} ({', '.join(sorted(set(values)))})"
+    return f"{field} {operator} {values[0]}"
+
+
+def normalize_jql(jql):
+    # Canonical clause set; queries with equal sets match the same issues
+    jql = unwrap(ORDER_BY_PATTERN.sub('', jql))
+    clauses = split_top_level(jql)
+    if clauses is None or len(clauses) == 1:
+        return frozenset([normalize_clause(jql)])
+
+    normalized = set()
+    for clause in clauses:
+        normalized |= normalize_jql(clause)
+    return frozenset(normalized)
+
+
+def local_filter(clause):
+    # (field, operator, values) for a normalized clause that can be checked on fetched issues, else None
+    match = CLAUSE_PATTERN.match(clause)
+    if match is None or match.group(1) not in LOCAL_FIELDS:
+        return None
+    field, operator, value = match.group(1), match.group(2), match.group(3)
+    if operator not in LOCAL_OPERATORS:
+        return None
+    values = parse_values(value)
+    # e.g. 'status = open or labels = x', an OR clause whose text only starts like a comparison
+    if values is None:
+        return None
+    values = frozenset(item.strip('"') for item in values)
+    if operator in ('is', 'is not') and not values <= EMPTY_VALUES:
+        return None
+    return field, operator, values
+
+
+def covers(base, clauses):
+    # base can serve clauses when it is strictly less restrictive and the difference is checkable locally
+    return base < clauses and all(local_filter(clause) is not None for clause in clauses - base)
+
+
+def plan_fetches(queries, needs_issues):
+    # queries maps any name to its JQL; needs_issues(name) is true where the issues themselves are used (defect
+    # ages, issue export), false where only the count per priority is. Returns (issue_fetches, count_fetches, plan):
+    # issue_fetches and count_fetches map a clause set to the one JQL downloaded, or counted, for it; plan maps
+    # every name to ('issues', clause set, local filters) or ('count', clause set, []).
+    normalized = {name: normalize_jql(jql) for name, jql in queries.items()}
+    issue_queries = {}
+    for name, clauses in normalized.items():
+        if needs_issues(name):
+            issue_queries.setdefault(clauses, queries[name])
+
+    # Only issue queries no other one can serve are downloaded; every other issue query has one of them as a
+    # base, since serving is transitive. The most restrictive base keeps the local filtering cheapest.
+    issue_fetches = {clauses: jql for clauses, jql in issue_queries.items()
+                     if not any(covers(other, clauses) for other in issue_queries)}
+    count_fetches = {}
+    plan = {}
+    for name, clauses in normalized.items():
+        bases = [base for base in issue_fetches if base == clauses or covers(base, clauses)]
+        if bases:
+            # Already downloaded for another query, so even a count costs no request
+            base = max(bases, key=len)
+            plan[name] = ('issues', base, [local_filter(clause) for clause in sorted(clauses - base)])
+        else:
+            # Counts stay count-only (maxResults=0 per priority bucket), once per distinct query
+            count_fetches.setdefault(clauses, queries[name])
+            plan[name] = ('count', clauses, [])
+    return issue_fetches, count_fetches, plan
+
+
+def filter_mask(column, field, operator, values):
+    if field == 'labels':
+        present = column.map(lambda labels: any(label.lower() in values for label in labels))
+        empty = column.map(len) == 0
+    else:
+        present = column.str.lower().isin(values)
+        empty = column.isna()
+        if field == 'resolution' and 'unresolved' in values:
+            present = present | empty
+
+    if operator in ('=', 'in'):
+        return present
+    if operator == 'is':
+        return empty
+    if operator == 'is not':
+        return ~empty
+    # Like Jira, negative operators never match issues where the field is empty
+    return ~present & ~empty
+
+
+def apply_filters(frame, filters):
+    for field, operator, values in filters:
+        frame = frame[filter_mask(frame[field], field, operator, values)]
+    return frame
@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+# Long-running report server. The Jira connection pool, the parsed queries.json and the issue cache stay
+# warm between requests; reports are served from GET /report?start=YYYY-MM-DD&end=YYYY-MM-DD&format=json|xlsx.
+
+REPORT_PATH = "/report"
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+
+class ReportService:
+
+    def __init__(self, json_file_path, output_dir, make_generator, result_ttl=60):
+        self.json_file_path = json_file_path
+        self.output_dir = output_dir
+        # Called with the parsed queries for every report; returns a JiraReportGenerator that shares the
+        # long-lived client and cache, so per-run state (timings, query memo) never crosses requests
+        self.make_generator = make_generator
+        # Seconds a finished report is served again before it is recomputed
+        self.result_ttl = result_ttl
+        self.lock = threading.Lock()
+        self.results = {}
+        self.queries = None
+        self.queries_mtime = None
+
+    def load_queries(self):
+        # Parsed once and reloaded only when queries.json changes on disk
+        mtime = os.path.getmtime(self.json_file_path)
+        with self.lock:
+            if self.queries is None or mtime != self.queries_mtime:
+                with open(self.json_file_path, 'r') as json_file:
+                    self.queries = json.load(json_file)
+                self.queries_mtime = mtime
+            return self.queries
+
+    def report(self, start_date, end_date):
+        # Identical requests share one computation: the first caller computes, everyone asking for the same
+        # period meanwhile (or within result_ttl afterwards) waits on the same future
+        key = (start_date, end_date)
+        with self.lock:
+            entry = self.results.get(key)
+            is_owner = entry is None or self.expired(entry)
+            if is_owner:
+                # Drop every expired report, not only this period's, so a long-running service doesn't keep
+                # the xlsx bytes of each period it was ever asked for
+                for expired_key in [other for other, other_entry in self.results.items() if self.expired(other_entry)]:
+                    del self.results[expired_key]
+                entry = {'future': Future(), 'finished_at': None}
+                self.results[key] = entry
+
+        if is_owner:
+            try:
+                entry['future'].set_result(self.compute(start_date, end_date))
+                with self.lock:
+                    entry['finished_at'] = time.time()
+            except Exception as e:
+                # Failures are not kept; the next request tries again
+                with self.lock:
+                    self.results.pop(key, None)
+                entry['future'].set_exception(e)
+        return entry['future'].result()
+
+    def expired(self, entry):
+        # Reports still being computed never expire
+        return entry['finished_at'] is not None and time.time() - entry['finished_at'] >= self.result_ttl
+
+    def compute(self, start_date, end_date):
+        generator = self.make_generator(queries=self.load_queries())
+        report_layout = generator.generate_report(start_date, end_date, self.output_dir)
+        if report_layout is None:
+            raise ValueError("Report not generated; check the log for the failing query or template.")
+
+        report_prefix, _ = generator.output_paths(start_date, end_date, self.output_dir)
+        with open(f"{report_prefix}.xlsx", 'rb') as xlsx_file:
+            xlsx = xlsx_file.read()
+        return {'json': self.report_json(start_date, end_date, report_layout), 'xlsx': xlsx}
+
+    def report_json(self, start_date, end_date, report_layout):
+        # {"report": {"BugsRaised": {"Regression": {"Blocker": 3, ...}, ..., "Overall": 42}, ...}}
+        report = {}
+        for row, values in report_layout.iterrows():
+            cells = report.setdefault(row, {})
+            for (category, priority), value in values.items():
+                value = value.item() if hasattr(value, 'item') else value
+                if priority:
+                    cells.setdefault(category, {})[priority] = value
+                else:
+                    cells[category] = value
+        return json.dumps({'start_date': start_date, 'end_date': end_date, 'report': report}).encode('utf-8')
+
+    def make_server(self, host='127.0.0.1', port=8765):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                logging.info("%s - %s", self.address_string(), format % args)
+
+            def send_body(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def send_error_json(self, status, message):
+                self.send_body(status, CONTENT_TYPES['json'], json.dumps({'error': message}).encode('utf-8'))
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != REPORT_PATH:
+                    self.send_error_json(404, f"Unknown path; use {REPORT_PATH}?start=YYYY-MM-DD&end=YYYY-MM-DD")
+                    return
+
+                params = parse_qs(url.query)
+                start_date = params.get('start', [None])[0]
+                end_date = params.get('end', [None])[0]
+                output_format = params.get('format', ['json'])[0]
+                try:
+                    datetime.strptime(start_date or '', "%Y-%m-%d")
+                    datetime.strptime(end_date or '', "%Y-%m-%d")
+                except ValueError:
+                    self.send_error_json(400, "start and end must be dates as YYYY-MM-DD")
+                    return
+                if output_format not in CONTENT_TYPES:
+                    self.send_error_json(400, f"format must be one of: {', '.join(CONTENT_TYPES)}")
+                    return
+
+                try:
+                    result = service.report(start_date, end_date)
+                except requests.exceptions.RequestException as e:
+                    self.send_error_json(502, f"Jira requests failed after retries: {e}")
+                    return
+                except Exception as e:
+                    logging.exception("Report for %s to %s failed", start_date, end_date)
+                    self.send_error_json(500, str(e))
+                    return
+                self.send_body(200, CONTENT_TYPES[output_format], result[output_format])
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        return server
+
+    def serve(self, host='127.0.0.1', port=8765):
+        server = self.make_server(host, port)
+        print(f"Serving reports on http://{host}:{server.server_address[1]}{REPORT_PATH}"
+              f"?start=YYYY-MM-DD&end=YYYY-MM-DD&format=json|xlsx")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
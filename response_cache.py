@@ -0,0 +1,96 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from issue_record import IssueRecord
+
+# On-disk cache of Jira search results, keyed by Jira instance, user and the final JQL (plus requested fields).
+# One cache file may be shared by queries files with different api_credentials.
+# Issue lists are stored as zlib-compressed JSON rows of IssueRecords in a single SQLite file.
+
+# Part of every key, so entries stored in an older issue format are never read back (they age out by LRU)
+CACHE_FORMAT = 3
+
+
+class ResponseCache:
+
+    def __init__(self, path, ttl_seconds=3600, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        # Entries younger than the TTL are served as-is; older ones are refreshed incrementally
+        self.ttl_seconds = ttl_seconds
+        # Least recently used entries are evicted once the compressed payloads exceed this size
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        with self.connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " cache_key TEXT PRIMARY KEY,"
+                " issues BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_sync TEXT,"
+                " stored_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def make_key(self, jql_query, fields=None, api_url=None, username=None):
+        # The same JQL returns different issues on another instance, or for a user with other permissions
+        return f"{CACHE_FORMAT}|{api_url}|{username}|{fields or '*'}|{jql_query}"
+
+    def get(self, cache_key):
+        with self.lock, self.connect() as connection:
+            row = connection.execute(
+                "SELECT issues, last_sync, stored_at FROM responses WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE responses SET accessed_at = ? WHERE cache_key = ?", (time.time(), cache_key))
+
+        issues, last_sync, stored_at = row
+        return {
+            'issues': [IssueRecord.from_row(issue_row) for issue_row in json.loads(zlib.decompress(issues))],
+            'last_sync': last_sync,
+            'stored_at': stored_at
+        }
+
+    def is_fresh(self, entry):
+        return time.time() - entry['stored_at'] < self.ttl_seconds
+
+    def put(self, cache_key, issues, last_sync):
+        payload = zlib.compress(json.dumps([issue.as_row() for issue in issues], separators=(',', ':')).encode('utf-8'))
+        now = time.time()
+        with self.lock, self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (cache_key, issues, size, last_sync, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key, payload, len(payload), last_sync, now, now)
+            )
+            self.evict(connection)
+
+    def evict(self, connection):
+        total_size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+
+        rows = connection.execute("SELECT cache_key, size FROM responses ORDER BY accessed_at").fetchall()
+        for cache_key, size in rows:
+            if total_size <= self.max_bytes:
+                break
+            connection.execute("DELETE FROM responses WHERE cache_key = ?", (cache_key,))
+            total_size -= size
+
+    def clear(self):
+        with self.lock, self.connect() as connection:
+            connection.execute("DELETE FROM responses")
@@ -0,0 +1,151 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from issue_record import IssueRecord, intern_name, newest_updated
+
+# Local snapshot of the issues each query template matched, so daily runs of the same report only
+# fetch and apply the issues changed since the last run. Per template it keeps the issue rows, the
+# issue count per priority name (updated as rows change) and the newest 'updated' seen (watermark).
+
+
+class SnapshotStore:
+
+    def __init__(self, path, resync_seconds=7 * 24 * 3600):
+        self.path = path
+        # Issues that stop matching a query never show up in a delta; a periodic full sync drops them
+        self.resync_seconds = resync_seconds
+        self.lock = threading.Lock()
+
+        with self.connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                " snapshot_key TEXT PRIMARY KEY,"
+                " end_date TEXT NOT NULL,"
+                " watermark TEXT,"
+                " synced_at REAL NOT NULL,"
+                " full_synced_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS issues ("
+                " snapshot_key TEXT NOT NULL,"
+                " issue_key TEXT NOT NULL,"
+                " priority TEXT NOT NULL,"
+                " status TEXT,"
+                " resolution TEXT,"
+                " created TEXT,"
+                " resolutiondate TEXT,"
+                " labels TEXT,"
+                " updated TEXT,"
+                " PRIMARY KEY (snapshot_key, issue_key))"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS priority_counts ("
+                " snapshot_key TEXT NOT NULL,"
+                " priority TEXT NOT NULL,"
+                " count INTEGER NOT NULL,"
+                " PRIMARY KEY (snapshot_key, priority))"
+            )
+
+    @contextmanager
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def make_key(self, json_file_path, name, template, start_date):
+        # The end date is not part of the key: a quarter-to-date report keeps the same snapshot
+        # while its end date moves forward day by day
+        category, sub_query = name
+        return f"{json_file_path}|{category}/{sub_query}|{start_date}|{template}"
+
+    def state(self, snapshot_key):
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT end_date, watermark, synced_at, full_synced_at FROM snapshots WHERE snapshot_key = ?", (snapshot_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        end_date, watermark, synced_at, full_synced_at = row
+        return {'end_date': end_date, 'watermark': watermark, 'synced_at': synced_at, 'full_synced_at': full_synced_at}
+
+    def needs_full_sync(self, state, end_date):
+        # A shorter period can't be derived from the stored one, and old snapshots may hold stale issues
+        return (state is None or end_date < state['end_date'] or state['watermark'] is None
+                or time.time() - state['full_synced_at'] >= self.resync_seconds)
+
+    def issue_row(self, issue):
+        return (issue.key, issue.priority or '', issue.status, issue.resolution, issue.created, issue.resolutiondate,
+                json.dumps(list(issue.labels)), issue.updated)
+
+    def apply(self, snapshot_key, end_date, issues, full=False):
+        # Upsert the given issues and move their counts between priorities; a full sync replaces the snapshot.
+        # Rows are built before taking the lock so a slow fetch doesn't hold up other templates.
+        rows = [self.issue_row(issue) for issue in issues]
+        now = time.time()
+
+        with self.lock, self.connect() as connection:
+            state = None if full else self.state(snapshot_key)
+            if full:
+                connection.execute("DELETE FROM issues WHERE snapshot_key = ?", (snapshot_key,))
+                connection.execute("DELETE FROM priority_counts WHERE snapshot_key = ?", (snapshot_key,))
+
+            for row in rows:
+                issue_key, priority = row[0], row[1]
+                previous = connection.execute(
+                    "SELECT priority FROM issues WHERE snapshot_key = ? AND issue_key = ?", (snapshot_key, issue_key)
+                ).fetchone()
+                if previous is not None:
+                    self.add_count(connection, snapshot_key, previous[0], -1)
+                connection.execute(
+                    "INSERT OR REPLACE INTO issues (snapshot_key, issue_key, priority, status, resolution,"
+                    " created, resolutiondate, labels, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (snapshot_key,) + row
+                )
+                self.add_count(connection, snapshot_key, priority, 1)
+
+            connection.execute(
+                "INSERT OR REPLACE INTO snapshots (snapshot_key, end_date, watermark, synced_at, full_synced_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (snapshot_key, end_date, newest_updated((row[-1] for row in rows), state and state['watermark']), now,
+                 now if full else state['full_synced_at'])
+            )
+        return len(rows)
+
+    def add_count(self, connection, snapshot_key, priority, delta):
+        connection.execute(
+            "INSERT INTO priority_counts (snapshot_key, priority, count) VALUES (?, ?, ?)"
+            " ON CONFLICT (snapshot_key, priority) DO UPDATE SET count = count + excluded.count",
+            (snapshot_key, priority, delta)
+        )
+
+    def priority_counts(self, snapshot_key):
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT priority, count FROM priority_counts WHERE snapshot_key = ? AND count != 0", (snapshot_key,)
+            ).fetchall()
+        return {priority or None: count for priority, count in rows}
+
+    def issue_count(self, snapshot_key):
+        return sum(self.priority_counts(snapshot_key).values())
+
+    def issues(self, snapshot_key):
+        # Stored issues as IssueRecords, for the per-issue calculations
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT issue_key, priority, status, resolution, created, resolutiondate, labels, updated"
+                " FROM issues WHERE snapshot_key = ?", (snapshot_key,)
+            ).fetchall()
+        return [IssueRecord(None, issue_key, intern_name(priority), intern_name(status), intern_name(resolution), created,
+                            resolutiondate, tuple(json.loads(labels)), updated)
+                for issue_key, priority, status, resolution, created, resolutiondate, labels, updated in rows]
+
+    def clear(self):
+        with self.lock, self.connect() as connection:
+            for table in ('snapshots', 'issues', 'priority_counts'):
+                connection.execute(f"DELETE FROM {table}")
@@ -0,0 +1,223 @@
+import json
+import random
+import re
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Jira search stand-in that evaluates the JQL it is sent against a fixed, seeded issue list, so reports built
+# from reworded, deduplicated or locally filtered queries can be checked against what Jira itself would match.
+# It understands the JQL the report templates use: AND/OR and parentheses; =, !=, in, not in and is (not) EMPTY
+# on labels, status, resolution, priority, issuetype and project; date comparisons on created and updated; id
+# ranges and ORDER BY id for keyset pagination. Like Jira, negative operators never match an empty field.
+# Usable in-process as a client (search) or over HTTP (start/api_url/stop).
+
+SEARCH_PATH = "/rest/api/latest/search"
+ORDER_BY_PATTERN = re.compile(r'\s+ORDER\s+BY\s+(.*)$', re.IGNORECASE | re.DOTALL)
+CLAUSE_PATTERN = re.compile(r'^(\w+)\s*(not\s+in|in|is\s+not|is|!=|>=|<=|=|>|<)\s*(.+)$', re.IGNORECASE | re.DOTALL)
+FIELD_ALIASES = {'type': 'issuetype'}
+NAME_FIELDS = {'labels', 'status', 'resolution', 'priority', 'issuetype', 'project'}
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.000+0000"
+
+PRIORITY_NAMES = ['Blocker', 'Critical', 'Major', 'Minor']
+STATUSES = ['Open', 'In Progress', 'Resolved', 'Closed']
+RESOLUTIONS = ['Fixed', 'Duplicate', 'By Design']
+PROJECTS = ['Vega', 'Lab Management Services (LMS)']
+LABELS = ['vega-ta', 'vega-ta-reg', 'vega-ta-stability', 'vega-ta-stability-reg', 'vega-ta-stability-exp', 'dosta-gerrit',
+          'Dosta-gerrit', 'DOSTA-INVDUP', 'other']
+
+DATES = 'created >= "{{start_date}}" AND created <= "{{end_date}}"'
+PROJECT = 'project not in ("Lab Management Services (LMS)")'
+
+
+def report_queries(labels, api_url=None):
+    # queries.json contents in the shape of the real one, over the fake's labels: per category, the count
+    # templates plus the two defect-age templates
+    def templates(category_label):
+        scope = f'issuetype = Bug AND labels = {labels} AND labels in ({category_label}) AND {DATES}'
+        return {
+            'BugsRaised': f'{scope} ORDER BY priority DESC',
+            'Resolved': f'{scope} AND status in (Resolved, Closed)',
+            'Fixed': f'{scope} AND {PROJECT} AND resolution = "Fixed"',
+            'GerritFix': f'{scope} AND labels in ("dosta-gerrit", "Dosta-gerrit")',
+            'Noise': f'{scope} AND resolution in (Duplicate, "By Design") AND labels not in ("DOSTA-INVDUP")',
+            'Resolution': f'{scope} AND {PROJECT} AND status in (Resolved, Closed)',
+            'Resolved_Defect': f'{scope} AND {PROJECT} AND status in (Resolved, Closed)',
+            'Un-Resolved_Defect': f'{scope} AND {PROJECT} AND status not in (Resolved, Closed)',
+        }
+    return {'Regression': templates('vega-ta-stability-reg'), 'Exploratory': templates('vega-ta-stability-exp'),
+            'api_credentials': {'api_url': api_url, 'api_username': 'test', 'api_password': 'test'}}
+
+
+def make_issues(total_issues, seed=0, start=datetime(2024, 1, 1)):
+    generator = random.Random(seed)
+    issues = []
+    for index in range(total_issues):
+        status = generator.choice(STATUSES)
+        created = start + timedelta(days=generator.randint(0, 200), hours=generator.randint(0, 23))
+        resolved = created + timedelta(days=generator.randint(0, 40)) if status in ('Resolved', 'Closed') else None
+        issues.append({'id': str(1000 + index), 'key': f"T-{index}", 'fields': {
+            # A few issues have no priority, to exercise the 'priority is EMPTY' bucket
+            'priority': {'name': generator.choice(PRIORITY_NAMES)} if generator.random() > 0.05 else None,
+            'status': {'name': status},
+            'resolution': {'name': generator.choice(RESOLUTIONS)} if resolved else None,
+            'issuetype': {'name': 'Bug' if generator.random() > 0.1 else 'Task'},
+            'project': {'name': generator.choice(PROJECTS)},
+            'labels': generator.sample(LABELS, generator.randint(0, 4)),
+            'created': created.strftime(TIMESTAMP_FORMAT),
+            'resolutiondate': resolved.strftime(TIMESTAMP_FORMAT) if resolved else None,
+            'updated': (resolved or created).strftime(TIMESTAMP_FORMAT)}})
+    return issues
+
+
+def split_top_level(jql, connective):
+    # Operands of a connective outside quotes and parentheses
+    operands, depth, in_quotes, start = [], 0, False, 0
+    separator = f" {connective} "
+    position = 0
+    while position < len(jql):
+        character = jql[position]
+        if character == '"':
+            in_quotes = not in_quotes
+        elif not in_quotes and character == '(':
+            depth += 1
+        elif not in_quotes and character == ')':
+            depth -= 1
+        elif not in_quotes and depth == 0 and jql[position:position + len(separator)].upper() == separator:
+            operands.append(jql[start:position])
+            position = start = position + len(separator)
+            continue
+        position += 1
+    operands.append(jql[start:])
+    return [operand.strip() for operand in operands]
+
+
+def parse_values(value):
+    value = value.strip()
+    if value.startswith('(') and value.endswith(')'):
+        value = value[1:-1]
+    return {item.strip().strip('"').lower() for item in value.split(',')}
+
+
+def field_names(issue, field):
+    # Lower-cased names a name field holds; empty when the field is
+    value = issue['fields'].get(field)
+    if field == 'labels':
+        return {label.lower() for label in value}
+    return {value['name'].lower()} if value else set()
+
+
+def compare(left, operator, right):
+    return {'=': left == right, '!=': left != right, '>': left > right, '>=': left >= right, '<': left < right,
+            '<=': left <= right}[operator]
+
+
+def matches(issue, jql):
+    jql = jql.strip()
+    for connective, combine in (('OR', any), ('AND', all)):
+        operands = split_top_level(jql, connective)
+        if len(operands) > 1:
+            return combine(matches(issue, operand) for operand in operands)
+    if jql.startswith('(') and jql.endswith(')'):
+        return matches(issue, jql[1:-1])
+
+    clause = CLAUSE_PATTERN.match(jql)
+    if clause is None:
+        raise ValueError(f"Unsupported JQL clause: {jql}")
+    field = FIELD_ALIASES.get(clause.group(1).lower(), clause.group(1).lower())
+    operator = ' '.join(clause.group(2).lower().split())
+    value = clause.group(3).strip()
+
+    if field in ('created', 'updated'):
+        # A date literal is midnight of that day, so 'created <= "2024-06-30"' excludes the rest of that day
+        timestamp = issue['fields'][field][:16].replace('T', ' ')
+        literal = value.strip('"')
+        return compare(timestamp, operator, literal if len(literal) > 10 else f"{literal} 00:00")
+    if field == 'id':
+        return compare(int(issue['id']), operator, int(value))
+    if field not in NAME_FIELDS:
+        return True
+
+    names = field_names(issue, field)
+    if operator in ('is', 'is not'):
+        return (not names) == (operator == 'is')
+    wanted = parse_values(value)
+    if operator in ('=', 'in'):
+        return bool(names & wanted) or (field == 'resolution' and not names and 'unresolved' in wanted)
+    return bool(names) and not names & wanted
+
+
+class EvalJira:
+
+    def __init__(self, total_issues=300, seed=0):
+        self.issues = make_issues(total_issues, seed)
+        self.lock = threading.Lock()
+        # (jql, maxResults) of every search, in arrival order
+        self.requests = []
+        self.server = None
+
+    def update_issue(self, key, updated, **names):
+        # Edit name fields (e.g. status='Closed', None to empty one) the way Jira would, moving 'updated'
+        issue = next(issue for issue in self.issues if issue['key'] == key)
+        for field, name in names.items():
+            issue['fields'][field] = {'name': name} if name is not None else None
+        issue['fields']['updated'] = updated
+
+    def matching(self, jql_query):
+        ordering = ORDER_BY_PATTERN.search(jql_query)
+        hits = [issue for issue in self.issues if matches(issue, ORDER_BY_PATTERN.sub('', jql_query))]
+        if ordering and re.match(r'id\s+DESC', ordering.group(1), re.IGNORECASE):
+            hits.reverse()
+        return hits
+
+    def matching_keys(self, jql_query):
+        return {issue['key'] for issue in self.matching(jql_query)}
+
+    def search(self, params, instrumentation=None, query_name=None):
+        start_at = int(params.get('startAt', 0))
+        max_results = min(int(params.get('maxResults', 50)), 100)
+        with self.lock:
+            self.requests.append((params['jql'], max_results))
+        hits = self.matching(params['jql'])
+        return {'startAt': start_at, 'maxResults': max_results, 'total': len(hits),
+                'issues': hits[start_at:start_at + max_results]}
+
+    def close(self):
+        pass
+
+    def start(self):
+        eval_jira = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != SEARCH_PATH:
+                    self.send_error(404)
+                    return
+
+                params = {name: values[0] for name, values in parse_qs(url.query).items()}
+                payload = json.dumps(eval_jira.search(params)).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def api_url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}{SEARCH_PATH}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,106 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from eval_jira import EvalJira, report_queries
+from exporters import make_exporters
+from QMR_MBR import QueryMemo, overlap_ranges, run_batch
+
+# Two overlapping quarters, and a month overlapping neither
+OVERLAPPING = [('2024-01-01', '2024-03-31'), ('2024-02-01', '2024-04-30')]
+SEPARATE = ('2024-06-01', '2024-06-30')
+
+
+@pytest.fixture
+def jira():
+    jira = EvalJira(total_issues=300).start()
+    yield jira
+    jira.stop()
+
+
+def write_queries(tmp_path, name, queries):
+    path = tmp_path / f"{name}.json"
+    path.write_text(json.dumps(queries))
+    return str(path)
+
+
+def report_files(output_dir):
+    return {name: pd.read_csv(os.path.join(output_dir, name)) for name in sorted(os.listdir(output_dir))
+            if name.endswith(('_report.csv', '_report_defect_ages.csv', '_report_issues.csv'))}
+
+
+def test_overlap_ranges():
+    assert overlap_ranges(OVERLAPPING + [SEPARATE]) == {
+        OVERLAPPING[0]: ('2024-01-01', '2024-04-30'), OVERLAPPING[1]: ('2024-01-01', '2024-04-30'), SEPARATE: None}
+    # Overlap through a third period still joins the range
+    assert overlap_ranges([('2024-01-01', '2024-01-31'), ('2024-03-01', '2024-03-31'), ('2024-01-15', '2024-03-15')]) == {
+        period: ('2024-01-01', '2024-03-31') for period in
+        [('2024-01-01', '2024-01-31'), ('2024-03-01', '2024-03-31'), ('2024-01-15', '2024-03-15')]}
+
+
+@pytest.mark.parametrize('export_issues', [False, True])
+def test_overlapping_periods_download_issues_once(tmp_path, jira, export_issues):
+    path = write_queries(tmp_path, 'team', report_queries('vega-ta', jira.api_url))
+    periods = OVERLAPPING + [SEPARATE]
+
+    # The reports each period gets on its own
+    for period in periods:
+        assert run_batch([path], [period], str(tmp_path / "single"), 2, 4, None, False, make_exporters(['csv']), export_issues)
+    single_downloads = [jql for jql, max_results in jira.requests if max_results > 0]
+    jira.requests.clear()
+
+    assert run_batch([path], periods, str(tmp_path / "batch"), 2, 4, None, False, make_exporters(['csv']), export_issues)
+    downloads = [jql for jql, max_results in jira.requests if max_results > 0]
+
+    # The two quarters share one download per issue query, over the range they span
+    assert len(downloads) == len(single_downloads) * 2 // 3
+    assert sum('"2024-04-30"' in jql and '"2024-01-01"' in jql for jql in downloads) == len(downloads) // 2
+
+    single, batch = report_files(tmp_path / "single"), report_files(tmp_path / "batch")
+    assert len(single) == 3 * (3 if export_issues else 2) and list(single) == list(batch)
+    for name, frame in single.items():
+        if name.endswith('_issues.csv'):
+            # Sliced periods list their issues by created date rather than in Jira's order
+            frame = frame.sort_values(['category', 'sub_query', 'key'], ignore_index=True)
+            batch[name] = batch[name].sort_values(['category', 'sub_query', 'key'], ignore_index=True)
+        pd.testing.assert_frame_equal(frame, batch[name], check_exact=False)
+
+
+def test_report_that_fails_validation_fails_the_batch(tmp_path, jira):
+    queries = report_queries('vega-ta', jira.api_url)
+    del queries['Regression']['Resolved_Defect']
+    path = write_queries(tmp_path, 'broken', queries)
+    good = write_queries(tmp_path, 'good', report_queries('vega-ta', jira.api_url))
+
+    assert not run_batch([path, good], [SEPARATE], str(tmp_path), 2, 4, None, False, make_exporters(['csv']))
+    assert os.path.exists(tmp_path / "good_2024-06-01_2024-06-30_report.csv")
+    assert not os.path.exists(tmp_path / "broken_2024-06-01_2024-06-30_report.csv")
+
+
+def test_unsliceable_trend_report_fails_the_batch(tmp_path, jira):
+    queries = report_queries('vega-ta', jira.api_url)
+    queries['Regression']['Fixed'] += ' AND resolved >= "{{start_date}}"'
+    path = write_queries(tmp_path, 'team', queries)
+
+    assert not run_batch([path], OVERLAPPING, str(tmp_path), 2, 4, None, True, make_exporters(['csv']))
+
+
+def test_memo_drops_results_once_expected_consumers_have_them():
+    memo = QueryMemo()
+    calls = []
+
+    def fetch_issue_frame(jql_query, fields=None):
+        calls.append(jql_query)
+        return jql_query.upper()
+
+    memo.expect([(fetch_issue_frame, 'a', {'fields': 'f'})] * 2)
+    assert memo.fetch(fetch_issue_frame, 'a', fields='f') == 'A'
+    assert memo.futures
+    assert memo.fetch(fetch_issue_frame, 'a', fields='f') == 'A'
+    assert memo.futures == {} and calls == ['a']
+    # Requests nobody announced are kept until the next reset, as in a single report
+    memo.fetch(fetch_issue_frame, 'b')
+    memo.fetch(fetch_issue_frame, 'b')
+    assert calls == ['a', 'b']
@@ -0,0 +1,20 @@
+import pytest
+
+from QMR_MBR import main
+
+PERIOD = ['--queries', 'queries.json', '--period', '2024-01-01:2024-01-31']
+
+
+@pytest.mark.parametrize('arguments, message', [
+    (['--trend', '--snapshot-store', 'snapshots.sqlite'] + PERIOD, "--trend cannot be combined with --snapshot-store"),
+    (['--multi-team', '--trend'] + PERIOD, "--multi-team cannot be combined with --trend"),
+    (['--multi-team', '--queries', 'queries.json'], "--multi-team needs the periods"),
+])
+def test_unsupported_option_combinations_are_rejected(tmp_path, monkeypatch, caplog, arguments, message):
+    # Rejected before any queries file, snapshot store or Jira connection is opened
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(SystemExit) as exit_info:
+        main(arguments)
+    assert exit_info.value.code == 1
+    assert message in caplog.text
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,106 @@
+import pytest
+
+from eval_jira import EvalJira
+from issue_record import IssueRecord
+from jql_dedup import apply_filters, covers, filter_mask, local_filter, normalize_jql, plan_fetches
+from QMR_MBR import JiraReportGenerator
+
+BASE = 'issuetype = Bug AND labels = vega-ta AND created >= "2024-01-01" AND created <= "2024-06-30"'
+
+
+def test_rewordings_normalize_equal():
+    assert normalize_jql(BASE) == normalize_jql(
+        'created <= "2024-06-30"  and (type = "Bug") AND labels in ("Vega-TA") and created >= "2024-01-01" ORDER BY key')
+
+
+def test_different_values_normalize_differently():
+    assert normalize_jql(BASE) != normalize_jql(BASE.replace('vega-ta', 'vega-ta-reg'))
+
+
+def test_or_query_is_one_clause():
+    assert len(normalize_jql('labels = a OR labels = b')) == 1
+    assert len(normalize_jql('(labels = a) AND (labels = b)')) == 2
+
+
+def test_covers_only_locally_filterable_extra_clauses():
+    base = normalize_jql(BASE)
+    assert covers(base, normalize_jql(BASE + ' AND status in (Resolved, Closed)'))
+    assert covers(base, normalize_jql(BASE + ' AND resolution is EMPTY'))
+    # priority is not fetched with the filter columns, and an OR can't be split into filters
+    assert not covers(base, normalize_jql(BASE + ' AND priority = Blocker'))
+    assert not covers(base, normalize_jql(BASE + ' AND (status = Open OR labels = x)'))
+    # Never the query itself, nor a wider one
+    assert not covers(base, base)
+    assert not covers(normalize_jql(BASE + ' AND status = Open'), base)
+
+
+def test_is_only_takes_empty():
+    assert local_filter('resolution is empty') is not None
+    assert local_filter('resolution is "fixed"') is None
+
+
+@pytest.fixture(scope='module')
+def jira():
+    return EvalJira(total_issues=400)
+
+
+@pytest.fixture(scope='module')
+def base_frame(jira):
+    generator = JiraReportGenerator(None, None, 'queries.json', client=jira)
+    issues = [IssueRecord.from_json(issue) for issue in jira.matching(BASE)]
+    return generator.issues_frame(None, None, issues, filter_columns=True)
+
+
+@pytest.mark.parametrize('clause', [
+    'status in (Resolved, Closed)',
+    'status not in (Resolved, Closed)',
+    'resolution = Fixed',
+    'resolution != Fixed',
+    'resolution in (Duplicate, "By Design")',
+    'resolution = Unresolved',
+    'resolution is EMPTY',
+    'resolution is not EMPTY',
+    'labels in (vega-ta-stability-reg, vega-ta-stability)',
+    'labels not in ("DOSTA-INVDUP", "other")',
+    'labels in ("dosta-gerrit", "Dosta-gerrit")',
+])
+def test_filter_mask_matches_jira(jira, base_frame, clause):
+    narrowed = normalize_jql(f"{BASE} AND {clause}")
+    filters = [local_filter(extra) for extra in sorted(narrowed - normalize_jql(BASE))]
+    assert set(apply_filters(base_frame, filters)['key']) == jira.matching_keys(f"{BASE} AND {clause}")
+
+
+def test_negative_filter_excludes_empty_fields(base_frame):
+    unresolved = base_frame['resolution'].isna()
+    mask = filter_mask(base_frame['resolution'], 'resolution', '!=', frozenset(['fixed']))
+    assert unresolved.any() and not mask[unresolved].any()
+
+
+def test_plan_keeps_count_queries_count_only():
+    queries = {
+        ('A', 'BugsRaised'): BASE,
+        ('B', 'BugsRaised'): BASE.replace('issuetype', 'type') + ' ORDER BY priority DESC',
+        ('A', 'Resolved'): BASE + ' AND status in (Resolved, Closed)',
+    }
+    issue_fetches, count_fetches, plan = plan_fetches(queries, lambda name: False)
+    assert issue_fetches == {}
+    # The reworded duplicate is counted once; the narrower query is counted, not downloaded to filter
+    assert len(count_fetches) == 2
+    assert plan[('A', 'BugsRaised')] == plan[('B', 'BugsRaised')] == ('count', normalize_jql(BASE), [])
+
+
+def test_plan_filters_narrower_queries_from_downloaded_issues():
+    resolved = BASE + ' AND status in (Resolved, Closed)'
+    queries = {
+        ('A', 'Resolved_Defect'): resolved,
+        ('A', 'Un-Resolved_Defect'): BASE + ' AND status not in (Resolved, Closed)',
+        ('A', 'BugsRaised'): BASE,
+        ('B', 'Resolved_Defect'): BASE + ' AND status in (Resolved, Closed) AND resolution = Fixed',
+        ('B', 'Resolved'): resolved,
+    }
+    issue_fetches, count_fetches, plan = plan_fetches(queries, lambda name: name[1].endswith('_Defect'))
+    assert set(issue_fetches) == {normalize_jql(resolved), normalize_jql(BASE + ' AND status not in (Resolved, Closed)')}
+    assert count_fetches == {normalize_jql(BASE): BASE}
+    # Served by the narrowest download that covers it, and counted from it without a request
+    assert plan[('B', 'Resolved_Defect')] == ('issues', normalize_jql(resolved), [('resolution', '=', frozenset(['fixed']))])
+    assert plan[('B', 'Resolved')] == ('issues', normalize_jql(resolved), [])
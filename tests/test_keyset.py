@@ -0,0 +1,53 @@
+import pytest
+
+from eval_jira import EvalJira
+from QMR_MBR import JiraReportGenerator
+
+JQL = 'labels = vega-ta ORDER BY priority DESC'
+
+
+@pytest.fixture
+def jira():
+    return EvalJira(total_issues=300)
+
+
+@pytest.fixture
+def generator(jira):
+    return JiraReportGenerator(None, None, 'queries.json', client=jira, page_size=10, max_workers=4, pagination='keyset')
+
+
+def test_shard_bounds_are_ids_of_matching_issues(jira, generator):
+    shards = generator.id_shards('labels = vega-ta')
+
+    matching_ids = [int(issue['id']) for issue in jira.matching('labels = vega-ta')]
+    bounds = [upper_id for _, upper_id in shards[:-1]]
+    assert len(shards) == 4
+    assert shards[0][0] is None and shards[-1][1] is None
+    assert set(bounds) <= set(matching_ids) and bounds == sorted(bounds)
+    # Roughly a quarter of the issues each
+    sizes = [sum(1 for issue_id in matching_ids if (after_id is None or issue_id > after_id)
+                 and (upper_id is None or issue_id <= upper_id)) for after_id, upper_id in shards]
+    assert max(sizes) - min(sizes) <= 1
+
+
+def test_keyset_scan_returns_every_matching_issue_once(jira, generator):
+    keys = [issue.key for issue in generator.iter_issues(JQL)]
+
+    assert len(keys) == len(set(keys))
+    assert set(keys) == jira.matching_keys(JQL)
+    # Pages are asked for by id, never by offset
+    scan_queries = [jql for jql, max_results in jira.requests if max_results == generator.page_size]
+    assert scan_queries and all('ORDER BY id ASC' in jql for jql in scan_queries)
+
+
+def test_small_result_is_one_open_shard(generator):
+    assert generator.id_shards('labels = vega-ta AND status = Open AND priority = Blocker') == [(None, None)]
+    assert generator.id_shards('labels = nothing') == [(None, None)]
+    assert list(generator.iter_issues('labels = nothing')) == []
+
+
+def test_keyset_frame_matches_offset_frame(jira, generator):
+    offset = JiraReportGenerator(None, None, 'queries.json', client=jira, page_size=10, max_workers=4)
+    keyset_frame = generator.fetch_issue_frame(JQL).sort_values('key', ignore_index=True)
+    offset_frame = offset.fetch_issue_frame(JQL).sort_values('key', ignore_index=True)
+    assert keyset_frame.equals(offset_frame)
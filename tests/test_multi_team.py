@@ -0,0 +1,78 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from eval_jira import DATES, EvalJira, report_queries
+from exporters import make_exporters
+from jql_dedup import normalize_jql
+from QMR_MBR import DEFECT_QUERIES, render_query, run_batch, run_multi_team
+
+PERIODS = [('2024-01-01', '2024-06-30')]
+
+
+@pytest.fixture
+def query_files(tmp_path):
+    jira = EvalJira(total_issues=300).start()
+    teams = {'teamA': report_queries('vega-ta', jira.api_url)}
+    # Team B words team A's queries differently and narrows some of them by status/resolution/labels
+    team_b = json.loads(json.dumps(teams['teamA']))
+    team_b['Regression']['BugsRaised'] = (f'labels in ("vega-ta-stability-reg") and {DATES}  AND type = Bug '
+                                          f'AND labels in (vega-ta) ORDER BY key')
+    team_b['Regression']['Resolved_Defect'] += ' AND resolution = Fixed'
+    team_b['Exploratory']['Fixed'] = team_b['Exploratory']['Resolved_Defect'] + ' AND resolution is EMPTY'
+    team_b['Exploratory']['Noise'] = team_b['Exploratory']['Un-Resolved_Defect'] + ' AND labels not in (other)'
+    teams['teamB'] = team_b
+    # Team C shares nothing with the others
+    teams['teamC'] = report_queries('vega-ta-reg', jira.api_url)
+
+    paths = []
+    for team, queries in teams.items():
+        path = tmp_path / f"{team}.json"
+        path.write_text(json.dumps(queries))
+        paths.append(str(path))
+    yield jira, paths
+    jira.stop()
+
+
+def report_files(output_dir, suffixes):
+    return {name: pd.read_csv(os.path.join(output_dir, name)) for name in sorted(os.listdir(output_dir))
+            if name.endswith(suffixes)}
+
+
+@pytest.mark.parametrize('export_issues', [False, True])
+def test_multi_team_reports_match_batch_reports(tmp_path, query_files, export_issues):
+    jira, paths = query_files
+    assert run_batch(paths, PERIODS, str(tmp_path / "batch"), 2, 4, None, False, make_exporters(['csv']), export_issues)
+    batch_requests = len(jira.requests)
+    assert run_multi_team(paths, PERIODS, str(tmp_path / "multi"), 2, 4, None, make_exporters(['csv']), export_issues)
+    assert len(jira.requests) - batch_requests < batch_requests
+
+    suffixes = ('_report.csv', '_report_defect_ages.csv', '_report_issues.csv')
+    batch, multi = report_files(tmp_path / "batch", suffixes), report_files(tmp_path / "multi", suffixes)
+    assert len(batch) == 3 * (3 if export_issues else 2) and list(batch) == list(multi)
+    for name, frame in batch.items():
+        if name.endswith('_issues.csv'):
+            # A query served from a wider download keeps that download's issue order
+            frame = frame.sort_values(['category', 'sub_query', 'key'], ignore_index=True)
+            multi[name] = multi[name].sort_values(['category', 'sub_query', 'key'], ignore_index=True)
+        pd.testing.assert_frame_equal(frame, multi[name], check_exact=False)
+
+
+def test_multi_team_downloads_issues_only_for_defect_ages(query_files, tmp_path):
+    jira, paths = query_files
+    assert run_multi_team(paths, PERIODS, str(tmp_path), 2, 4, None, make_exporters(['csv']))
+
+    defect_queries = set()
+    for path in paths:
+        with open(path) as json_file:
+            queries = json.load(json_file)
+        for category in ('Regression', 'Exploratory'):
+            for sub_query in DEFECT_QUERIES:
+                defect_queries.add(normalize_jql(render_query(queries[category][sub_query], *PERIODS[0])))
+    downloads = {normalize_jql(jql) for jql, max_results in jira.requests if max_results > 0}
+    assert downloads and downloads <= defect_queries
+    # Every other query is counted, and each distinct count query only once per priority bucket
+    counts = [jql for jql, max_results in jira.requests if max_results == 0]
+    assert len(counts) == len(set(counts))
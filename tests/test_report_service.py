@@ -0,0 +1,41 @@
+from report_service import ReportService
+
+
+class CountingService(ReportService):
+
+    # compute without Jira: returns the period and counts the computations
+    def __init__(self, result_ttl):
+        super().__init__('queries.json', 'reports', make_generator=None, result_ttl=result_ttl)
+        self.computed = []
+
+    def compute(self, start_date, end_date):
+        self.computed.append((start_date, end_date))
+        return {'json': f'{start_date}:{end_date}'.encode(), 'xlsx': b''}
+
+
+def test_finished_report_is_reused_within_ttl():
+    service = CountingService(result_ttl=60)
+    service.report('2024-01-01', '2024-01-31')
+    service.report('2024-01-01', '2024-01-31')
+    assert service.computed == [('2024-01-01', '2024-01-31')]
+
+
+def test_expired_reports_of_other_periods_are_evicted():
+    service = CountingService(result_ttl=0)
+    service.report('2024-01-01', '2024-01-31')
+    service.report('2024-02-01', '2024-02-29')
+    service.report('2024-03-01', '2024-03-31')
+    assert list(service.results) == [('2024-03-01', '2024-03-31')]
+
+
+def test_failed_report_is_not_kept():
+    service = CountingService(result_ttl=60)
+
+    def fail(start_date, end_date):
+        raise ValueError("template broken")
+    service.compute = fail
+    try:
+        service.report('2024-01-01', '2024-01-31')
+    except ValueError:
+        pass
+    assert service.results == {}
@@ -0,0 +1,85 @@
+import pytest
+
+from eval_jira import EvalJira
+from issue_record import IssueRecord
+from QMR_MBR import JiraReportGenerator
+from response_cache import ResponseCache
+
+JQL = 'labels = vega-ta AND status = Open ORDER BY priority DESC'
+LATER = '2025-01-02T10:00:00.000+0000'
+
+
+@pytest.fixture
+def jira():
+    return EvalJira(total_issues=300)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    # Every entry is stale at once, so each fetch after the first goes through the incremental refresh
+    return ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=0)
+
+
+@pytest.fixture
+def generator(jira, cache):
+    return JiraReportGenerator(None, None, 'queries.json', client=jira, cache=cache)
+
+
+def full_fetches(jira):
+    return [jql for jql, max_results in jira.requests if jql == JQL and max_results > 0]
+
+
+def test_fresh_entry_is_served_without_requests(jira, tmp_path):
+    generator = JiraReportGenerator(None, None, 'queries.json', client=jira,
+                                    cache=ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=3600))
+    first = generator.fetch_cached(JQL)
+    requests = len(jira.requests)
+
+    assert [issue.key for issue in generator.fetch_cached(JQL)] == [issue.key for issue in first]
+    assert len(jira.requests) == requests
+
+
+def test_issue_updated_after_watermark_is_merged(jira, generator):
+    issues = generator.fetch_cached(JQL)
+    changed_key = issues[0].key
+    new_priority = 'Critical' if issues[0].priority != 'Critical' else 'Blocker'
+    jira.update_issue(changed_key, LATER, priority=new_priority)
+
+    refreshed = {issue.key: issue for issue in generator.fetch_cached(JQL)}
+
+    delta_queries = [jql for jql, _ in jira.requests if 'updated >=' in jql]
+    assert len(delta_queries) == 1
+    assert len(full_fetches(jira)) == 1
+    assert set(refreshed) == jira.matching_keys(JQL)
+    assert refreshed[changed_key].priority == new_priority
+    # The next refresh starts from the changed issue's 'updated'
+    assert generator.cache.get(generator.cache.make_key(JQL))['last_sync'] == '2025-01-02 10:00'
+
+
+def test_issue_leaving_the_query_forces_full_refetch(jira, generator):
+    issues = generator.fetch_cached(JQL)
+    # No longer matches, so the delta can't return it; only the total disagrees
+    jira.update_issue(issues[0].key, LATER, status='Closed')
+
+    refreshed = generator.fetch_cached(JQL)
+
+    assert len(full_fetches(jira)) == 2
+    assert {issue.key for issue in refreshed} == jira.matching_keys(JQL)
+    assert issues[0].key not in {issue.key for issue in refreshed}
+
+
+def test_least_recently_used_entries_are_evicted_by_size(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    issues = [IssueRecord(index, f"T-{index}", 'Major', created='2024-01-01T10:00:00.000+0000') for index in range(50)]
+    cache.put('a', issues, None)
+    cache.put('b', issues, None)
+    with cache.connect() as connection:
+        two_entries = connection.execute("SELECT SUM(size) FROM responses").fetchone()[0]
+
+    # Room for two entries; 'a' was read after 'b' was stored, so 'b' goes when 'c' arrives
+    cache.max_bytes = two_entries
+    assert cache.get('a') is not None
+    cache.put('c', issues, None)
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
@@ -0,0 +1,113 @@
+import re
+
+import pytest
+
+from QMR_MBR import JiraReportGenerator
+from snapshot_store import SnapshotStore
+
+UPDATED_SINCE = re.compile(r'updated >= "([^"]+)"')
+
+
+class FakeSearch:
+
+    # Jira search stand-in over a mutable issue list; honours the 'updated >=' delta clause and paging
+    def __init__(self):
+        self.issues = {}
+        self.queries = []
+
+    def set_issue(self, key, priority, updated):
+        issue_id = self.issues[key]['id'] if key in self.issues else str(len(self.issues) + 1)
+        self.issues[key] = {'id': issue_id, 'key': key, 'fields': {
+            'priority': {'name': priority}, 'status': {'name': 'Open'}, 'resolution': None,
+            'created': '2024-01-02T10:00:00.000+0000', 'resolutiondate': None, 'labels': [], 'updated': updated}}
+
+    def search(self, params, instrumentation=None, query_name=None):
+        self.queries.append(params['jql'])
+        issues = list(self.issues.values())
+        since = UPDATED_SINCE.search(params['jql'])
+        if since:
+            issues = [issue for issue in issues
+                      if issue['fields']['updated'][:16].replace('T', ' ') >= since.group(1)]
+        start_at = params.get('startAt', 0)
+        max_results = params.get('maxResults', 50)
+        return {'total': len(issues), 'maxResults': max_results, 'issues': issues[start_at:start_at + max_results]}
+
+    def delta_queries(self):
+        return [jql for jql in self.queries if UPDATED_SINCE.search(jql)]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def jira():
+    return FakeSearch()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path / "snapshots.sqlite"))
+
+
+@pytest.fixture
+def generator(tmp_path, jira, store):
+    return JiraReportGenerator(None, None, str(tmp_path / "queries.json"), client=jira, snapshots=store)
+
+
+def test_first_sync_is_full_and_sets_watermark(jira, store, generator):
+    jira.set_issue('T-1', 'Blocker', '2024-01-03T10:00:00.000+0000')
+    jira.set_issue('T-2', 'Critical', '2024-01-05T08:30:00.000+0000')
+
+    assert generator.sync_snapshot('key', 'project = T', '2024-03-31') == 2
+    assert jira.delta_queries() == []
+    assert store.priority_counts('key') == {'Blocker': 1, 'Critical': 1}
+    assert store.state('key')['watermark'] == '2024-01-05 08:30'
+
+
+def test_priority_change_moves_count_with_a_delta(jira, store, generator):
+    jira.set_issue('T-1', 'Blocker', '2024-01-03T10:00:00.000+0000')
+    jira.set_issue('T-2', 'Critical', '2024-01-03T10:00:00.000+0000')
+    generator.sync_snapshot('key', 'project = T', '2024-03-31')
+
+    jira.set_issue('T-1', 'Critical', '2024-01-10T09:00:00.000+0000')
+    generator.sync_snapshot('key', 'project = T', '2024-03-31')
+
+    assert len(jira.delta_queries()) == 1
+    assert store.priority_counts('key') == {'Critical': 2}
+    assert store.state('key')['watermark'] == '2024-01-10 09:00'
+    assert {issue.key: issue.priority for issue in store.issues('key')} == {'T-1': 'Critical', 'T-2': 'Critical'}
+
+
+def test_issue_leaving_the_query_triggers_full_resync(jira, store, generator):
+    jira.set_issue('T-1', 'Blocker', '2024-01-03T10:00:00.000+0000')
+    jira.set_issue('T-2', 'Critical', '2024-01-03T10:00:00.000+0000')
+    generator.sync_snapshot('key', 'project = T', '2024-03-31')
+
+    # Gone from the results without a newer 'updated', so the delta can't see it; the count check can
+    del jira.issues['T-2']
+    generator.sync_snapshot('key', 'project = T', '2024-03-31')
+
+    assert len(jira.delta_queries()) == 1
+    assert store.priority_counts('key') == {'Blocker': 1}
+    assert store.issue_count('key') == 1
+    # First full fetch, then the delta, the count check and the full resync
+    assert jira.queries.count('project = T') == 3
+
+
+def test_end_date_rollback_needs_full_sync(jira, store, generator):
+    jira.set_issue('T-1', 'Blocker', '2024-01-03T10:00:00.000+0000')
+    generator.sync_snapshot('key', 'project = T', '2024-03-31')
+    state = store.state('key')
+
+    assert not store.needs_full_sync(state, '2024-04-30')
+    assert store.needs_full_sync(state, '2024-02-29')
+
+    generator.sync_snapshot('key', 'project = T', '2024-02-29')
+    assert jira.delta_queries() == []
+    assert store.state('key')['end_date'] == '2024-02-29'
+    assert store.priority_counts('key') == {'Blocker': 1}
+
+
+def test_old_snapshot_needs_full_sync(store):
+    state = {'end_date': '2024-03-31', 'watermark': '2024-01-03 10:00', 'synced_at': 0, 'full_synced_at': 0}
+    assert store.needs_full_sync(state, '2024-03-31')
@@ -0,0 +1,62 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from eval_jira import EvalJira, report_queries
+from exporters import make_exporters
+from QMR_MBR import CATEGORIES, render_query, run_batch
+
+# Back-to-back months sharing their boundary dates, so every operator pair decides differently where the
+# issues created exactly at a boundary belong
+BOUNDARIES = ['2024-01-01', '2024-02-01', '2024-03-01', '2024-04-01']
+PERIODS = list(zip(BOUNDARIES, BOUNDARIES[1:]))
+
+
+@pytest.fixture
+def jira():
+    jira = EvalJira(total_issues=300)
+    scope = render_query(report_queries('vega-ta')['Regression']['BugsRaised'], '2024-01-01', '2024-12-31')
+    keys = sorted(jira.matching_keys(scope))
+    boundary_issues = [issue for issue in jira.issues if issue['key'] in keys[:3 * len(BOUNDARIES)]]
+    for issue, boundary in zip(boundary_issues, BOUNDARIES * 3):
+        issue['fields']['created'] = f"{boundary}T00:00:00.000+0000"
+    jira.start()
+    yield jira
+    jira.stop()
+
+
+def report_files(output_dir):
+    return {name: pd.read_csv(os.path.join(output_dir, name)) for name in sorted(os.listdir(output_dir))
+            if name.endswith(('_report.csv', '_report_defect_ages.csv', '_report_issues.csv'))}
+
+
+@pytest.mark.parametrize('start_operator, end_operator', [('>=', '<='), ('>=', '<'), ('>', '<='), ('>', '<')])
+def test_trend_slices_match_period_reports(tmp_path, jira, start_operator, end_operator):
+    queries = report_queries('vega-ta', jira.api_url)
+    for category in CATEGORIES:
+        for name, template in queries[category].items():
+            queries[category][name] = (template.replace('created >= "{{start_date}}"', f'created {start_operator} "{{{{start_date}}}}"')
+                                               .replace('created <= "{{end_date}}"', f'created {end_operator} "{{{{end_date}}}}"'))
+    path = tmp_path / "team.json"
+    path.write_text(json.dumps(queries))
+
+    # Each period on its own, as Jira filters it, against one fetch sliced locally
+    for period in PERIODS:
+        assert run_batch([str(path)], [period], str(tmp_path / "periods"), 2, 4, None, False, make_exporters(['csv']), True)
+    assert run_batch([str(path)], PERIODS, str(tmp_path / "trend"), 2, 4, None, True, make_exporters(['csv']), True)
+
+    periods, trend = report_files(tmp_path / "periods"), report_files(tmp_path / "trend")
+    assert len(periods) == 3 * len(PERIODS) and list(periods) == list(trend)
+    for name, frame in periods.items():
+        if name.endswith('_issues.csv'):
+            # Trend slices list their issues by created date rather than in Jira's order
+            frame = frame.sort_values(['category', 'sub_query', 'key'], ignore_index=True)
+            trend[name] = trend[name].sort_values(['category', 'sub_query', 'key'], ignore_index=True)
+        pd.testing.assert_frame_equal(frame, trend[name], check_exact=False)
+
+    # Issues created exactly at a boundary are reported unless both ends are exclusive
+    issues = pd.concat(frame for name, frame in trend.items() if name.endswith('_issues.csv'))
+    boundary_rows = issues['created'].str.endswith('00:00:00+00:00') & issues['created'].str[:10].isin(BOUNDARIES)
+    assert boundary_rows.any() == (start_operator == '>=' or end_operator == '<=')
@@ -0,0 +1,78 @@
+import json
+import logging
+
+import pytest
+
+from eval_jira import EvalJira, report_queries
+from exporters import make_exporters
+from QMR_MBR import jql_problems, run_batch, template_problems, validate_query_files
+
+
+@pytest.mark.parametrize('template', [
+    "project = X AND summary ~ 'fix (crash'",
+    'project = X AND summary ~ "fix (crash"',
+    "project = X AND summary ~ 'it\\'s (broken'",
+    'project = X AND summary ~ "say \\"(hi\\"" AND (labels = a)',
+    "project = X AND summary ~ 'has \"(double\" quotes'",
+])
+def test_parentheses_in_strings_are_ignored(template):
+    assert jql_problems(template) == []
+
+
+@pytest.mark.parametrize('template, problem', [
+    ("project = X AND summary ~ 'fix", "unterminated quote"),
+    ("project = X AND summary ~ 'fix\\'", "unterminated quote"),
+    ("project = X AND (labels = 'a'", "unbalanced parentheses"),
+    ("project = X) AND (labels = a", "unbalanced parentheses"),
+    ("labels = a AND created >= {{start}}", "unknown placeholder '{{start}}'"),
+    ("   ", "template is empty"),
+])
+def test_broken_templates_are_reported(template, problem):
+    assert jql_problems(template) == [problem]
+
+
+def test_problems_outside_the_report_are_warnings():
+    queries = report_queries('vega-ta')
+    queries['Regression']['Resolution'] += ' AND (labels = a'
+    queries['Exploratory']['Scratch'] = 'labels = "unfinished'
+
+    errors, warnings = template_problems(queries)
+
+    assert errors == []
+    assert warnings == ["Regression JQL query 'Resolution': unbalanced parentheses",
+                        "Exploratory JQL query 'Scratch': unterminated quote"]
+
+
+def test_problems_in_templates_the_report_reads_are_errors():
+    queries = report_queries('vega-ta')
+    queries['Regression']['Un-Resolved_Defect'] += ' AND (labels = a'
+    del queries['Exploratory']['Noise']
+
+    errors, warnings = template_problems(queries)
+
+    assert errors == ["Regression JQL query 'Un-Resolved_Defect': unbalanced parentheses",
+                      "Exploratory JQL query for 'Noise' not found in JSON data."]
+    assert warnings == []
+
+
+@pytest.fixture
+def jira():
+    jira = EvalJira(total_issues=300).start()
+    yield jira
+    jira.stop()
+
+
+def test_report_runs_with_a_broken_unused_template(tmp_path, jira, caplog):
+    queries = report_queries('vega-ta', jira.api_url)
+    queries['Exploratory']['Scratch'] = 'labels = "unfinished'
+    path = tmp_path / "team.json"
+    path.write_text(json.dumps(queries))
+
+    with caplog.at_level(logging.WARNING):
+        assert run_batch([str(path)], [('2024-01-01', '2024-03-31')], str(tmp_path), 2, 4, None, False,
+                         make_exporters(['csv']))
+        assert validate_query_files([str(path)])
+
+    assert (tmp_path / "team_2024-01-01_2024-03-31_report.csv").exists()
+    assert "Exploratory JQL query 'Scratch': unterminated quote (not used by the report)" in caplog.text
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]